@@ -11,9 +11,18 @@
     This file provides the functionality to generate bar charts for hourly power consumption data.
 '''
 
-from datetime import datetime
-import plotly.express as px
+import base64
+
+import numpy as np
+import figures
 import hover_template as hover
+import preprocess
+import serialize
+
+# Zone columns shipped to the browser for the client-side drill-down, and the one charted
+ZONE_COLUMNS = ['PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3',
+                'PowerConsumption_AllZones']
+DEFAULT_ZONE = 'PowerConsumption_AllZones'
 
 
 def to_date_format(HourlyData, date_str):
@@ -27,51 +36,97 @@ def to_date_format(HourlyData, date_str):
     Returns:
         DataFrame: DataFrame containing data for the specified date.
     """
-    # Convert string to date format
-    date_format = datetime.strptime(date_str, '%Y-%m-%d').date()
-    specific_day_data = HourlyData[HourlyData['date'] == date_format]
+    # Convert string to its day key
+    day_key = preprocess.to_day_key(date_str)
+    specific_day_data = HourlyData[HourlyData['day_key'] == day_key]
 
-    return specific_day_data
+    return preprocess.attach_calendar(specific_day_data, ['hourNo'])
 
 
-def get_bar_chart(HourlyData, date_str):
+def get_bar_chart(HourlyData, date_str, zone_col=DEFAULT_ZONE):
     """
     Generate a bar chart for power consumption data on a specific date.
 
     Parameters:
         HourlyData (DataFrame): The hourly data DataFrame.
         date_str (str): Date string in the format 'YYYY-MM-DD'.
+        zone_col (str): The zone column to chart.
 
     Returns:
-        Figure: Plotly Figure object representing the bar chart.
+        dict: The figure of the bar chart.
     """
     # Filter the data for the specified date
     specific_day_data = to_date_format(HourlyData, date_str)
-    
-    # Create a bar chart using Plotly Express
-    fig = px.bar(
-        specific_day_data,
-        x='hourNo',
-        y='PowerConsumption_AllZones',
-        labels={
-            'hourNo': 'Hour',
-            'PowerConsumption_AllZones': 'Power Consumption (KW)'
-        },
-        title=f'Power Consumption for {date_str}'
-    )
-    
-    # Update hover template
-    fig.update(
-        data=[{
-            'hovertemplate': hover.get_barchart_hover_template()
-        }]
+
+    # Create a bar per hour
+    trace = figures.bar(
+        specific_day_data['hourNo'].to_numpy(),
+        specific_day_data[zone_col].to_numpy(),
+        marker={'color': figures.get_colorway()[0]},
+        showlegend=False,
+        hovertemplate=hover.get_barchart_hover_template()
     )
-    
+
     # Set layout options
-    fig.update_layout(dragmode='pan')
-    fig.update_layout(
-        xaxis=dict(fixedrange=True),  # Disables zoom on x-axis
-        yaxis=dict(fixedrange=True)   # Disables zoom on y-axis
+    return figures.figure(
+        [trace],
+        title=f'Power Consumption for {date_str}',
+        xaxis=figures.axis('Hour', fixedrange=True),  # Disables zoom on x-axis
+        yaxis=figures.axis('Power Consumption (KW)', fixedrange=True),  # Disables zoom on y-axis
+        barmode='relative',
+        dragmode='pan'
     )
 
-    return fig
\ No newline at end of file
+
+# Function to pack the hourly data for the client-side drill-down
+def get_hourly_matrix(HourlyData, zone_cols=None):
+    """
+    Pack the hourly maxima of each zone into a day x 24-hour x zone float32 matrix.
+
+    Parameters:
+        HourlyData (DataFrame): The hourly data DataFrame.
+        zone_cols (list): The zone columns to pack, defaults to ZONE_COLUMNS.
+
+    Returns:
+        dict: The day key of the first day, the number of days, the zone columns and the matrix as
+            base64-encoded little-endian float32 values, NaN for the hours without data.
+    """
+    zone_cols = zone_cols or ZONE_COLUMNS
+    day_keys = HourlyData['day_key'].to_numpy().astype('int64')
+    first_day_key = int(day_keys.min()) if len(day_keys) else 0
+    days = int(day_keys.max()) - first_day_key + 1 if len(day_keys) else 0
+
+    # Scatter each hourly row into its day and hour cell
+    matrix = np.full((days, 24, len(zone_cols)), np.nan, dtype='<f4')
+    matrix[day_keys - first_day_key, HourlyData['hour'].to_numpy()] = HourlyData[zone_cols].to_numpy(dtype='<f4')
+
+    return {
+        'first_day_key': first_day_key,
+        'days': days,
+        'zones': zone_cols,
+        'values': base64.b64encode(matrix.tobytes()).decode('ascii')
+    }
+
+
+# Function to get the data used by the client-side drill-down
+def get_bar_chart_store(HourlyData, zone_col=DEFAULT_ZONE):
+    """
+    Get the data rendering the bar chart of any day in the browser: the hourly matrix, and an empty
+    bar chart whose layout and trace style the browser reuses.
+
+    Parameters:
+        HourlyData (DataFrame): The hourly data DataFrame.
+        zone_col (str): The zone column to chart.
+
+    Returns:
+        dict: The data of the dcc.Store read by the clientside callback.
+    """
+    matrix = get_hourly_matrix(HourlyData)
+
+    # The browser replaces the title and the bars of this chart with the ones of the clicked day
+    first_date = str(np.datetime64(matrix['first_day_key'], 'D'))
+    figure = get_bar_chart(HourlyData.iloc[:24], first_date, zone_col=zone_col)
+    figure['data'][0].update(x=[], y=[])
+    figure = serialize.compact_figure(figure, 'bar_chart')
+
+    return {'figure': figure, 'matrix': matrix, 'zone': zone_col}
@@ -10,7 +10,16 @@
     This file provides the functionality to generate bubble plots for daily power consumption data.
 '''
 
-from plotly import express as px
+import numpy as np
+
+import figures
+import hover_template as hover
+
+# Diameter in pixels of the largest bubble, the default of plotly express
+BUBBLE_SIZE_MAX = 20
+
+# Columns shown in the hover labels after the date
+CUSTOMDATA_COLUMNS = ['Humidity', 'Temperature', 'WindSpeed', 'PowerConsumption_AllZones']
 
 
 def get_bubble_plot(DailyData, x_col, y_col):
@@ -23,56 +32,44 @@ def get_bubble_plot(DailyData, x_col, y_col):
         y_col (str): The column name for the y-axis.
 
     Returns:
-        Figure: Plotly Figure object representing the bubble plot.
+        dict: The figure of the bubble plot.
     """
-    fig = px.scatter(
-        DailyData,
-        x=x_col,
-        y=y_col,
-        size='PowerConsumption_AllZones',  # Size bubbles by PowerConsumption_AllZones
-        color='PowerConsumption_AllZones',  # Color bubbles by PowerConsumption_AllZones
-        title=f'Bubble Plot: {x_col} vs. {y_col} with Power Consumption Size',
-        labels={
-            x_col: x_col.replace('_', ' '),  # Replace underscores with spaces for readability
-            y_col: y_col.replace('_', ' '),
-            'PowerConsumption_AllZones': 'Power Consumption'
-        }
-    )
+    # Resolve the dates shown in the hover template from the day keys
+    dates = figures.to_date_strings(DailyData['day_key'].to_numpy().astype('datetime64[D]'))
+    customdata = np.empty((len(DailyData), len(CUSTOMDATA_COLUMNS) + 1), dtype=object)
+    customdata[:, 0] = dates
+    customdata[:, 1:] = DailyData[CUSTOMDATA_COLUMNS].to_numpy()
 
-    # Define hover template
-    hover_template = (
-        '<b>Date:</b> %{customdata[0]}<br>'
-        '<b>Humidity:</b> %{customdata[1]:.2f}RH<br>'
-        '<b>Temperature:</b> %{customdata[2]:.2f}ºC<br>'
-        '<b>WindSpeed:</b> %{customdata[3]:.2f}m/s<br>'
-        '<b>Power Consumption:</b> %{customdata[4]:.2f}W<br>'
-        '<b>Month:</b> %{customdata[5]}<br>'
-        '<extra></extra>'  # This removes the secondary box with extra data
-    )
-
-    # Add hover template and custom data to the figure
-    fig.update_traces(
-        hovertemplate=hover_template,
-        customdata=DailyData[
-            ['date', 'Humidity', 'Temperature', 'WindSpeed', 'PowerConsumption_AllZones', 'MonthName']]
-    )
-
-    # Customize bubble plot appearance
-    fig.update_traces(
+    # Size and color bubbles by PowerConsumption_AllZones
+    consumption = DailyData['PowerConsumption_AllZones'].to_numpy()
+    largest = np.nanmax(consumption) if len(consumption) else 1
+    trace = figures.scatter(
+        DailyData[x_col].to_numpy(),
+        DailyData[y_col].to_numpy(),
         marker=dict(
+            color=consumption,
+            coloraxis='coloraxis',
+            size=consumption,
+            sizemode='area',
+            sizeref=largest / BUBBLE_SIZE_MAX ** 2,
+            symbol='circle',
             line=dict(width=1, color='DarkSlateGrey')  # Set marker line properties
         ),
-        selector=dict(mode='markers')  # Set marker mode to 'markers'
+        showlegend=False,
+        customdata=customdata,
+        hovertemplate=hover.get_bubble_plot_hover_template()
     )
 
     # Customize layout
-    fig.update_layout(
-        xaxis_title=x_col.replace('_', ' '),  # Set x-axis title dynamically
-        yaxis_title=y_col.replace('_', ' '),  # Set y-axis title dynamically
+    return figures.figure(
+        [trace],
         title=f'Bubble Plot: {x_col} vs. {y_col} with Power Consumption Size',
-        dragmode='pan',  # Enable panning mode
-        xaxis=dict(fixedrange=True),  # Disable zoom on x-axis
-        yaxis=dict(fixedrange=True),   # Disable zoom on y-axis
+        xaxis=figures.axis(x_col.replace('_', ' '), fixedrange=True),  # Disable zoom on x-axis
+        yaxis=figures.axis(y_col.replace('_', ' '), fixedrange=True),  # Disable zoom on y-axis
+        coloraxis=dict(
+            colorbar=dict(title=dict(text='Power Consumption')),
+            colorscale=figures.get_sequential_colorscale()
+        ),
+        legend=dict(itemsizing='constant'),
+        dragmode='pan'  # Enable panning mode
     )
-
-    return fig
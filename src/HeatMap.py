@@ -9,15 +9,96 @@
     Python Version: 3.8
 
     This file provides the functionality to generate heatmaps for daily power consumption data across different zones.
+    The daily values are pivoted into one dense (day of week x week) matrix per year, shown in one
+    panel per year; the date of each cell is carried in its customdata.
 '''
 
+import base64
+
+import numpy as np
 import plotly.graph_objects as go
+
 import hover_template as hover
+import preprocess
+import serialize
+
+# Zones selectable in the heatmap, with the suffix of their title
+ZONES = {
+    'PowerConsumption_AllZones': 'All Zones',
+    'PowerConsumption_Zone1': 'Zone 1',
+    'PowerConsumption_Zone2': 'Zone 2',
+    'PowerConsumption_Zone3': 'Zone 3'
+}
+DEFAULT_ZONE = 'PowerConsumption_AllZones'
+
+# Abbreviated month names, used as the ticks of the week axis
+MONTH_ABBREVIATIONS = [month[:3] for month in preprocess.MONTH_NAMES]
+
+
+# Function to pivot daily values into a calendar matrix per year
+def get_calendar_matrices(DailyData, zone_col):
+    """
+    Pivot the daily values of a column into one (day of week x week) matrix per year.
+
+    Column j of the matrix of a year is the j-th week starting on or before January 1st, so the
+    weeks that wrap around the end of the year never collide with the ones at its start.
+
+    Parameters:
+        DailyData (DataFrame): The daily data DataFrame.
+        zone_col (str): The column name of the values.
+
+    Returns:
+        list: For each year, a dictionary with the year, the day key of the Monday of its first
+            column, the 7 x weeks matrix of the values (NaN for the days without data) and the
+            7 x weeks matrix of the dates ('' for the days without data).
+    """
+    day_keys = DailyData['day_key'].to_numpy().astype('int64')
+    values = DailyData[zone_col].to_numpy()
+    years = day_keys.astype('datetime64[D]').astype('datetime64[Y]').astype('int64') + 1970
+
+    calendars = []
+    for year in np.unique(years):
+        in_year = years == year
+        year_day_keys = day_keys[in_year]
+
+        # 1970-01-01 is a Thursday, so Monday is day 0 of the week for (day_key + 3) % 7
+        first_day_key = int(np.datetime64(f'{year}-01-01', 'D').astype('int64'))
+        first_monday = first_day_key - (first_day_key + 3) % 7
+        last_day_key = int(np.datetime64(f'{year}-12-31', 'D').astype('int64'))
+        weeks = (last_day_key - first_monday) // 7 + 1
+
+        rows = (year_day_keys + 3) % 7
+        columns = (year_day_keys - first_monday) // 7
+
+        z = np.full((7, weeks), np.nan)
+        z[rows, columns] = values[in_year]
+        dates = np.full((7, weeks), '', dtype=object)
+        dates[rows, columns] = year_day_keys.astype('datetime64[D]').astype(str)
+
+        calendars.append({'year': int(year), 'first_monday': first_monday, 'z': z, 'dates': dates})
+
+    return calendars
+
+
+# Function to get the ticks of the week axis of a year
+def get_month_ticks(year, first_monday):
+    """
+    Get the week columns where each month of a year starts.
+
+    Parameters:
+        year (int): The year.
+        first_monday (int): The day key of the Monday of the first week column.
+
+    Returns:
+        tuple: The column of the first day of each month and the abbreviated month names.
+    """
+    month_starts = np.arange(f'{year}-01', f'{year + 1}-01', dtype='datetime64[M]').astype('datetime64[D]')
+    return ((month_starts.astype('int64') - first_monday) // 7).tolist(), MONTH_ABBREVIATIONS
 
 
 def get_heatmap(DailyData, zone_col, title_suffix):
     """
-    Generate a heatmap for power consumption for a specified zone.
+    Generate a heatmap for power consumption for a specified zone, with one panel per year.
 
     Parameters:
         DailyData (DataFrame): The daily data DataFrame.
@@ -27,43 +108,77 @@ def get_heatmap(DailyData, zone_col, title_suffix):
     Returns:
         Figure: Plotly Figure object representing the heatmap for the specified zone.
     """
-    # Filter data for the specified zone
-    zone_data = DailyData[['date', 'week', 'DayName', 'DayOfYear', 'MonthName', zone_col]]
-
-    # Ensure unique combinations of 'DayOfYear' and 'week'
-    zone_data_unique = zone_data.drop_duplicates(subset=['week', 'DayOfYear'])
-    zone_data_unique['MonthYear'] = zone_data_unique['MonthName'] + ' ' + (
-            zone_data_unique['DayOfYear'] // 1000).astype(str)
-    unique_months = zone_data_unique.groupby('MonthYear')['week'].min().reset_index()
-
-    # Create the heatmap
-    fig = go.Figure(data=go.Heatmap(
-        z=zone_data_unique[zone_col],
-        x=zone_data_unique['week'],
-        y=zone_data_unique['DayName'],
-        customdata=zone_data_unique[['date', 'DayOfYear', 'week', 'DayName']],
-        colorscale='Viridis',
-        colorbar=dict(title='Power Consumption(W)'),
-        hovertemplate=(
-                '<b>Date:</b> %{customdata[0]}<br>' +
-                '<b>Day of Year:</b> %{customdata[1]}<br>' +
-                '<b>Week:</b> %{customdata[2]}<br>' +
-                '<b>Day:</b> %{customdata[3]}<br>' +
-                '<b>Power Consumption:</b> %{z} W<br>' +
-                '<extra></extra>'
-        )
-    ))
-
-    # Update the layout
-    fig.update_layout(
-        title=f'Power Consumption {title_suffix}',
-        yaxis_title="Day of Week",
-        xaxis=dict(
-            tickvals=unique_months['week'],
-            ticktext=unique_months['MonthYear'].str.split().str[0],
-            fixedrange=True  # Disables zoom on x-axis
-        ),
-        yaxis=dict(fixedrange=True)  # Disables zoom on y-axis
-    )
-
-    return fig
+    calendars = get_calendar_matrices(DailyData, zone_col)
+    panels = max(len(calendars), 1)
+
+    # One panel per year, stacked from the top; several years get a fixed height per panel
+    height = 150 + 250 * panels if panels > 1 else None
+    gap = 60 / height if height else 0
+    panel_height = (1 - gap * (panels - 1)) / panels
+
+    traces = []
+    layout = {
+        'title': f'Power Consumption {title_suffix}',
+        'coloraxis': dict(colorscale='Viridis', colorbar=dict(title='Power Consumption(W)')),
+        'annotations': []
+    }
+    for i, calendar in enumerate(calendars):
+        suffix = str(i + 1) if i else ''
+        top = 1 - i * (panel_height + gap)
+        tickvals, ticktext = get_month_ticks(calendar['year'], calendar['first_monday'])
+
+        traces.append(go.Heatmap(
+            z=calendar['z'],
+            y=preprocess.DAY_NAMES,
+            customdata=calendar['dates'],
+            coloraxis='coloraxis',
+            hovertemplate=hover.get_heatmap_hover_template(),
+            name=str(calendar['year']),
+            xaxis=f'x{suffix}',
+            yaxis=f'y{suffix}'
+        ))
+        layout[f'xaxis{suffix}'] = dict(anchor=f'y{suffix}', tickvals=tickvals, ticktext=ticktext,
+                                        fixedrange=True)  # Disables zoom
+        layout[f'yaxis{suffix}'] = dict(anchor=f'x{suffix}', domain=[max(top - panel_height, 0), top],
+                                        autorange='reversed', fixedrange=True)  # Monday on top
+        if height:
+            layout['annotations'].append(dict(text=str(calendar['year']), x=0.5, y=top, xref='paper',
+                                              yref='paper', xanchor='center', yanchor='bottom', showarrow=False))
+    if height:
+        layout['height'] = height
+
+    return go.Figure(data=traces, layout=layout)
+
+
+# Function to get the data used by the client-side zone selection
+def get_heatmap_store(DailyData, zones=None, default_zone=DEFAULT_ZONE):
+    """
+    Get the data rendering the heatmap of any zone in the browser: the figure of the default zone
+    without its values, and the matrices of the values of every zone.
+
+    Parameters:
+        DailyData (DataFrame): The daily data DataFrame.
+        zones (dict): The zone columns and the suffixes of their titles, defaults to ZONES.
+        default_zone (str): The zone whose figure carries the layout and the dates.
+
+    Returns:
+        dict: The data of the dcc.Store read by the clientside callback. The matrices of each
+            zone are base64-encoded little-endian float32 values, one 7 x weeks matrix per year.
+    """
+    zones = zones or ZONES
+
+    # The dates and the layout are the same for every zone
+    figure = get_heatmap(DailyData, default_zone, zones[default_zone]).update_traces(z=[])
+    figure = serialize.compact_figure(figure, 'heatmap')
+
+    zone_matrices = {}
+    weeks = []
+    for zone_col, title_suffix in zones.items():
+        calendars = get_calendar_matrices(DailyData, zone_col)
+        weeks = [calendar['z'].shape[1] for calendar in calendars]
+        zone_matrices[zone_col] = {
+            'title': f'Power Consumption {title_suffix}',
+            'z': [base64.b64encode(calendar['z'].astype('<f4').tobytes()).decode('ascii') for calendar in calendars]
+        }
+
+    return {'figure': figure, 'weeks': weeks, 'zones': zone_matrices, 'default_zone': default_zone}
@@ -13,119 +13,109 @@
     This file provides the functionality to generate scatter plot charts for daily power consumption data.
 '''
 
-import plotly.express as px
+import base64
+
+import downsample
+import figures
 import hover_template as hover
-from globals import df
+import globals
+import serialize
+
+# Zone columns of the 3-zone scatter plot, with their names in the legend
+THREE_ZONES = {
+    'PowerConsumption_Zone1': 'Zone 1',
+    'PowerConsumption_Zone2': 'Zone 2',
+    'PowerConsumption_Zone3': 'Zone 3'
+}
 
 
 # Function to create a scatter plot chart based on user-specified columns
-def get_ScatterPlotChart(DailyData, x_col, y_col):
+def get_ScatterPlotChart(DailyData, x_col, y_col, max_points=None):
     """
     Generate a scatter plot chart for two specified columns.
 
+    The points are drawn with WebGL above downsample.WEBGL_THRESHOLD points. When max_points is
+    given, a larger cloud is thinned to one point per cell of a grid of max_points cells.
+
     Parameters:
         DailyData (DataFrame): The daily data DataFrame.
         x_col (str): The column name for the x-axis.
         y_col (str): The column name for the y-axis.
+        max_points (int): The maximum number of points to draw, or None to draw them all.
 
     Returns:
-        Figure: Plotly Figure object representing the scatter plot chart.
+        dict: The figure of the scatter plot chart.
     """
-    # Define the title of the chart
-    title = f'{x_col} vs. {y_col}'
+    x_values = DailyData[x_col].to_numpy()
+    y_values = DailyData[y_col].to_numpy()
+
+    # Thin the cloud, keeping its outline and outliers
+    if max_points is not None and len(DailyData) > max_points:
+        indices = downsample.grid_indices(x_values, y_values, max_points)
+        x_values, y_values = x_values[indices], y_values[indices]
 
     # Create the scatter plot
-    fig = px.scatter(
-        DailyData,
-        x=x_col,
-        y=y_col,
-        title=title
+    trace = figures.scatter(
+        x_values,
+        y_values,
+        render_mode=downsample.get_render_mode(len(x_values)),
+        marker=dict(color=figures.get_colorway()[0], symbol='circle'),
+        showlegend=False,
+        hovertemplate=hover.get_scatterplotchart_hover_template(x_col, y_col)
     )
 
     # Disable zoom on axes
-    fig.update_layout(
-        dragmode='pan',
-        xaxis=dict(fixedrange=True),
-        yaxis=dict(fixedrange=True)
+    return figures.figure(
+        [trace],
+        title=f'{x_col} vs. {y_col}',
+        xaxis=figures.axis(x_col, fixedrange=True),
+        yaxis=figures.axis(y_col, fixedrange=True),
+        dragmode='pan'
     )
 
-    # Update hover template
-    fig.update(
-        data=[{
-            'hovertemplate': hover.get_scatterplotchart_hover_template(x_col, y_col)
-        }]
-    )
 
-    return fig
-
-
-def get_ScatterPlotChart_3Zones(x_col='Temperature'):
+def get_ScatterPlotChart_3Zones(x_col='Temperature', DailyData=None):
     """
     Generate a scatter plot chart showing the correlation between a selected column 
     (e.g., Temperature, WindSpeed, Humidity) and power consumption across three zones.
 
     Parameters:
         x_col (str): The column name for the x-axis. Defaults to 'Temperature'.
+        DailyData (DataFrame): The daily data. Defaults to the daily data of the current data.
 
     Returns:
-        Figure: Plotly Figure object representing the scatter plot chart for three zones.
+        dict: The figure of the scatter plot chart for three zones.
     """
-    
-    # Define columns for averaging and finding the maximum
-    columns_to_avg = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows']
-    columns_to_max = ['PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3', 'PowerConsumption_AllZones']
-
-    # Group by specified columns and aggregate
-    DailyData_df = df.groupby(
-        ['date', 'week', 'DayName', 'MonthName', 'MonthNumber', 'DayOfMonth', 'DayOfYear', 'day_of_week']
-    ).agg(
-        {**{col: 'mean' for col in columns_to_avg}, **{col: 'max' for col in columns_to_max}}
-    ).reset_index()
-
-    # Create initial scatter plot for Zone 1
-    fig = px.scatter(
-        DailyData_df,
-        x=x_col,
-        y='PowerConsumption_Zone1',
-        title=f'Correlation between {x_col} and Power Consumption',
-        labels={x_col: x_col, 'PowerConsumption_Zone1': 'Power Consumption'},
-        opacity=0.7,
-    )
+    # Resolve the dates of the precomputed daily data
+    if DailyData is None:
+        DailyData = globals.get_dataset().df_daily
+    dates = figures.to_date_strings(DailyData['day_key'].to_numpy().astype('datetime64[D]'))
 
-    # Update trace for Zone 1 with customdata and legend
-    fig.update_traces(
-        name='Zone 1',
-        customdata=DailyData_df['date'],  # Add date as customdata
-        showlegend=True,
-        marker=dict(size=8),
-    )
-
-    # Add trace for PowerConsumption_Zone2
-    fig.add_scatter(
-        x=DailyData_df[x_col],
-        y=DailyData_df['PowerConsumption_Zone2'],
-        mode='markers',
-        name='Zone 2',
-        customdata=DailyData_df['date'],
-        marker=dict(size=8),
-        showlegend=True,
-    )
-
-    # Add trace for PowerConsumption_Zone3
-    fig.add_scatter(
-        x=DailyData_df[x_col],
-        y=DailyData_df['PowerConsumption_Zone3'],
-        mode='markers',
-        name='Zone 3',
-        customdata=DailyData_df['date'],
-        marker=dict(size=8),
-        showlegend=True,
-    )
+    # Create one trace per zone, sharing the x values and the dates
+    x_values = DailyData[x_col].to_numpy()
+    hover_template = hover.get_scatterplotchartforenergy_hover_template(x_col)
+    traces = [
+        figures.scatter(
+            x_values,
+            DailyData[zone_col].to_numpy(),
+            name=name,
+            customdata=dates,  # Add date as customdata
+            marker=dict(size=8, symbol='square'),
+            showlegend=True,
+            hovertemplate=hover_template
+        )
+        for zone_col, name in THREE_ZONES.items()
+    ]
+    traces[0]['marker'].update(color=figures.get_colorway()[0], opacity=0.7)
 
     # Update layout for legend and axis titles
-    fig.update_layout(
+    return figures.figure(
+        traces,
+        title=f'Correlation between {x_col} and Power Consumption',
+        xaxis=figures.axis(x_col, fixedrange=True),  # Update x-axis title dynamically
+        yaxis=figures.axis('Power Consumption(w)', fixedrange=True),  # Update y-axis title and disable zoom
         legend=dict(
-            title='Zone',
+            title=dict(text='Zone'),
             orientation='v',  # Vertical legend
             yanchor='middle', y=0.5,  # Center vertically
             xanchor='left', x=1.05,  # Place legend to the right of the plot
@@ -138,14 +128,55 @@ def get_ScatterPlotChart_3Zones(x_col='Temperature'):
             )
         ),
         margin=dict(r=200),  # Add right margin to make space for the legend
-        xaxis=dict(title=x_col, fixedrange=True),  # Update x-axis title dynamically
-        yaxis=dict(title='Power Consumption(w)', fixedrange=True),  # Update y-axis title and disable zoom
-        dragmode='pan',
+        dragmode='pan'
     )
 
-    fig.update_traces(marker=dict(symbol='square'))
-    # Add hover template at the end
-    hover_template = hover.get_scatterplotchartforenergy_hover_template(x_col)
-    fig.update_traces(hovertemplate=hover_template)
 
-    return fig
+# Function to build the skeleton of the 3-zone scatter plot, kept by the browser
+def get_ScatterPlotChart_3Zones_store(DailyData, version=None, x_col='Temperature'):
+    """
+    Build the data of the store holding the parts of the 3-zone scatter plot that do not depend on
+    the x-axis column: the layout, the power consumption of each zone and the dates, sent once
+    for the three traces.
+
+    Parameters:
+        DailyData (DataFrame): The daily data.
+        version (int): The version of the data.
+        x_col (str): The x-axis column of the figure the skeleton is built from.
+
+    Returns:
+        dict: The data of the dcc.Store read by the clientside callback.
+    """
+    figure = get_ScatterPlotChart_3Zones(x_col, DailyData)
+    for trace in figure['data']:
+        trace['x'] = []
+        del trace['customdata'], trace['hovertemplate']
+    dates = figures.to_date_strings(DailyData['day_key'].to_numpy().astype('datetime64[D]')).tolist()
+
+    return {'version': version, 'figure': serialize.compact_figure(figure, 'scatter_3zones'), 'dates': dates}
+
+
+# Function to build the parts of the 3-zone scatter plot that change with the x-axis column
+def get_ScatterPlotChart_3Zones_update(DailyData, x_col, version=None):
+    """
+    Build the x values, hover template and titles of the 3-zone scatter plot for an x-axis column,
+    merged into the skeleton of the store by the browser.
+
+    Parameters:
+        DailyData (DataFrame): The daily data.
+        x_col (str): The column name for the x-axis.
+        version (int): The version of the data, to match the update with its skeleton.
+
+    Returns:
+        dict: The update, with the x values shared by the three zones as base64-encoded
+            little-endian float32 values.
+    """
+    x_values = DailyData[x_col].to_numpy().astype('<f4')
+
+    return {
+        'version': version,
+        'x': base64.b64encode(x_values.tobytes()).decode('ascii'),
+        'hovertemplate': hover.get_scatterplotchartforenergy_hover_template(x_col),
+        'title': f'Correlation between {x_col} and Power Consumption',
+        'x_title': x_col
+    }
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: aggregate.py
+    Purpose: Contains the time-bucket aggregation engine for the power consumption data.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to aggregate the preprocessed data at several time
+    resolutions (10-minute, hour, day, ISO week and month) in a single pass. Samples are assigned
+    an integer bucket id and reduced with vectorized NumPy segment reductions; the calendar labels
+    are attached afterwards through the date dimension (see preprocess.attach_calendar).
+'''
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Columns to average and to find the maximum
+COLUMNS_TO_AVG = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows']
+COLUMNS_TO_MAX = ['PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3',
+                  'PowerConsumption_AllZones']
+
+# Supported resolutions, from the finest to the coarsest
+RESOLUTIONS = ('10min', 'hour', 'day', 'week', 'month')
+
+# Running reduction of each bucket: the bucket ids, and per bucket the sums and non-missing counts
+# of the averaged columns and the maxima of the other ones
+BucketState = namedtuple('BucketState', ['keys', 'sums', 'counts', 'maxima'])
+
+
+def _day_keys_to_month_ids(day_keys):
+    """
+    Convert day keys to month ids, the number of months since 1970-01.
+
+    Parameters:
+        day_keys (ndarray): The day keys.
+
+    Returns:
+        ndarray: The month ids.
+    """
+    return np.asarray(day_keys).astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+
+
+def reduce_buckets(keys, sums, counts, maxima):
+    """
+    Reduce the rows sharing the same bucket id with segment reductions.
+
+    Parameters:
+        keys (ndarray): The bucket id of each row.
+        sums (ndarray): The sums of the averaged columns, one row per input row.
+        counts (ndarray): The non-missing counts of the averaged columns.
+        maxima (ndarray): The maxima of the other columns.
+
+    Returns:
+        BucketState: The reduction of each bucket, sorted by bucket id.
+    """
+    if len(keys) == 0:
+        return BucketState(keys, sums, counts, maxima)
+
+    # Segment reductions need the rows of a bucket to be contiguous
+    if np.any(keys[1:] < keys[:-1]):
+        order = np.argsort(keys, kind='stable')
+        keys, sums, counts, maxima = keys[order], sums[order], counts[order], maxima[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return BucketState(
+        keys[starts],
+        np.add.reduceat(sums, starts, axis=0),
+        np.add.reduceat(counts, starts, axis=0),
+        # fmax ignores missing values, like the pandas max aggregation
+        np.fmax.reduceat(maxima, starts, axis=0)
+    )
+
+
+def _roll_up(state, to_parent):
+    """
+    Reduce the buckets of a resolution into the buckets of a coarser one.
+
+    Parameters:
+        state (BucketState): The reduction at the finer resolution.
+        to_parent (callable): Maps the finer bucket ids to the coarser ones.
+
+    Returns:
+        BucketState: The reduction at the coarser resolution.
+    """
+    return reduce_buckets(to_parent(state.keys), state.sums, state.counts, state.maxima)
+
+
+def compute_states(df, resolutions=RESOLUTIONS):
+    """
+    Reduce the preprocessed data into buckets at several resolutions in a single pass.
+
+    Only the 10-minute and hourly buckets are computed from the samples; the coarser
+    resolutions are rolled up from the hourly buckets.
+
+    Parameters:
+        df (DataFrame): The preprocessed data DataFrame.
+        resolutions (iterable): The resolutions to compute.
+
+    Returns:
+        dict: The BucketState of each requested resolution.
+    """
+    values_to_avg = df[COLUMNS_TO_AVG].to_numpy(dtype='float64')
+    missing = np.isnan(values_to_avg)
+    sums = np.where(missing, 0.0, values_to_avg)
+    counts = (~missing).astype('int64')
+    maxima = df[COLUMNS_TO_MAX].to_numpy(dtype='float64')
+
+    states = {}
+    if '10min' in resolutions:
+        ten_minutes = df['datetime'].to_numpy().astype('datetime64[m]').astype('int64') // 10
+        states['10min'] = reduce_buckets(ten_minutes, sums, counts, maxima)
+
+    # Epoch hour of each sample
+    hours = df['day_key'].to_numpy().astype('int64') * 24 + df['hour'].to_numpy()
+    hourly = reduce_buckets(hours, sums, counts, maxima)
+    if 'hour' in resolutions:
+        states['hour'] = hourly
+
+    if {'day', 'week', 'month'} & set(resolutions):
+        daily = _roll_up(hourly, lambda keys: keys // 24)
+        if 'day' in resolutions:
+            states['day'] = daily
+        if 'week' in resolutions:
+            # 1970-01-01 is a Thursday, so ISO weeks start 3 days before every multiple of 7
+            states['week'] = _roll_up(daily, lambda keys: (keys + 3) // 7)
+        if 'month' in resolutions:
+            states['month'] = _roll_up(daily, _day_keys_to_month_ids)
+
+    return states
+
+
+def _get_bucket_keys(keys, resolution):
+    """
+    Get the key columns identifying the buckets of a resolution.
+
+    Parameters:
+        keys (ndarray): The bucket ids.
+        resolution (str): The resolution of the buckets.
+
+    Returns:
+        dict: The key columns, each bucket being identified by the day key of its first day.
+    """
+    if resolution == '10min':
+        starts = (keys * 10).astype('datetime64[m]')
+        days = starts.astype('datetime64[D]')
+        return {
+            'day_key': days.astype('int64').astype('int32'),
+            'hour': (starts.astype('datetime64[h]') - days).astype('int8'),
+            'datetime': starts.astype('datetime64[ns]')
+        }
+    if resolution == 'hour':
+        return {'day_key': (keys // 24).astype('int32'), 'hour': (keys % 24).astype('int8')}
+    if resolution == 'day':
+        return {'day_key': keys.astype('int32')}
+    if resolution == 'week':
+        starts = keys * 7 - 3
+        return {
+            'day_key': starts.astype('int32'),
+            'datetime': starts.astype('datetime64[D]').astype('datetime64[ns]')
+        }
+    if resolution == 'month':
+        starts = keys.astype('datetime64[M]').astype('datetime64[D]')
+        return {
+            'day_key': starts.astype('int64').astype('int32'),
+            'datetime': starts.astype('datetime64[ns]')
+        }
+    raise ValueError(f'Unknown resolution: {resolution}')
+
+
+def state_to_frame(state, resolution, dtypes=None):
+    """
+    Convert the reduction of the buckets of a resolution to a frame.
+
+    Parameters:
+        state (BucketState): The reduction of the buckets.
+        resolution (str): The resolution of the buckets.
+        dtypes (Series): The dtypes of the measure columns, defaults to float64.
+
+    Returns:
+        DataFrame: The means and maxima of each bucket, keyed by the day key of its first day
+            (and the hour for the 10-minute and hourly resolutions).
+    """
+    columns = _get_bucket_keys(state.keys, resolution)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = state.sums / state.counts
+    for i, col in enumerate(COLUMNS_TO_AVG):
+        columns[col] = means[:, i]
+    for i, col in enumerate(COLUMNS_TO_MAX):
+        columns[col] = state.maxima[:, i]
+
+    frame = pd.DataFrame(columns)
+    if dtypes is not None:
+        frame = frame.astype({col: dtypes[col] for col in COLUMNS_TO_AVG + COLUMNS_TO_MAX})
+
+    if resolution == 'hour':
+        # Combine day and hour into a single datetime column for plotting
+        frame['datetime1'] = (state.keys.astype('datetime64[h]')).astype('datetime64[ns]')
+
+    return frame
+
+
+def aggregate(df, resolutions=RESOLUTIONS):
+    """
+    Aggregate the preprocessed data at several resolutions in a single pass.
+
+    The averaged columns are reduced with their mean and the power consumption columns with
+    their maximum, keeping the dtypes of the input columns.
+
+    Parameters:
+        df (DataFrame): The preprocessed data DataFrame.
+        resolutions (iterable): The resolutions to compute, among RESOLUTIONS.
+
+    Returns:
+        dict: The aggregated frame of each requested resolution.
+    """
+    states = compute_states(df, resolutions)
+    return {resolution: state_to_frame(states[resolution], resolution, df.dtypes) for resolution in resolutions}
+
+
+class BucketBuffer:
+    """
+    Running reduction of the buckets of a resolution, kept in arrays with spare capacity so that
+    merging new samples rewrites the buckets they touch without copying the previous ones.
+
+    Attributes:
+        length (int): The number of buckets.
+    """
+
+    def __init__(self, state):
+        self._arrays = list(state)
+        self.length = len(state.keys)
+
+    @property
+    def state(self):
+        """
+        BucketState: Views over the buckets, valid until the next merge.
+        """
+        return BucketState(*(array[:self.length] for array in self._arrays))
+
+    def merge(self, update):
+        """
+        Merge the reduction of new samples in place.
+
+        Only the buckets from the first one touched by the new samples onwards are reduced again,
+        so appending recent samples costs time proportional to the new data.
+
+        Parameters:
+            update (BucketState): The reduction of the new samples.
+
+        Returns:
+            int: The position of the first changed bucket.
+        """
+        if len(update.keys) == 0:
+            return self.length
+
+        first = int(np.searchsorted(self.state.keys, update.keys.min()))
+        tail = reduce_buckets(*(np.concatenate((old[first:], new)) for old, new in zip(self.state, update)))
+        end = first + len(tail.keys)
+
+        # Grow the arrays geometrically, so that their copies cost constant time per bucket
+        if end > len(self._arrays[0]):
+            capacity = max(end, 2 * len(self._arrays[0]))
+            grown = []
+            for array in self._arrays:
+                new_array = np.empty((capacity, *array.shape[1:]), dtype=array.dtype)
+                new_array[:first] = array[:first]
+                grown.append(new_array)
+            self._arrays = grown
+
+        for array, new in zip(self._arrays, tail):
+            array[first:end] = new
+        self.length = end
+        return first
+
+
+def truncate_chunks(chunks, length):
+    """
+    Keep the first rows of a frame stored as a list of consecutive chunks, without copying them.
+
+    Parameters:
+        chunks (list): The chunks of the frame, in order.
+        length (int): The number of rows to keep.
+
+    Returns:
+        list: The chunks of the first rows.
+    """
+    kept, total = [], 0
+    for chunk in chunks:
+        if total + len(chunk) > length:
+            if length > total:
+                kept.append(chunk.iloc[:length - total])
+            break
+        kept.append(chunk)
+        total += len(chunk)
+    return kept
+
+
+def update_aggregates(chunks, buffers, new_df):
+    """
+    Update aggregated frames and their running reductions with new samples.
+
+    The frames are lists of chunks: the rows before the first changed bucket are kept in their
+    chunks as they are, and the changed buckets are appended as a new chunk, so that the cost is
+    proportional to the new samples. The buffers are updated in place.
+
+    Parameters:
+        chunks (dict): The chunks of the aggregated frame of each resolution.
+        buffers (dict): The BucketBuffer of each resolution, built from compute_states.
+        new_df (DataFrame): The new preprocessed samples.
+
+    Returns:
+        dict: The updated chunks of each resolution.
+    """
+    updates = compute_states(new_df, list(buffers))
+
+    new_chunks = {}
+    for resolution, update in updates.items():
+        buffer, frame_chunks = buffers[resolution], chunks[resolution]
+        first = buffer.merge(update)
+
+        # The chunk owns its values, the buffer rewrites its last buckets on the next merge
+        changed = BucketState(*(array[first:].copy() for array in buffer.state))
+        new_chunks[resolution] = (truncate_chunks(frame_chunks, first)
+                                  + [state_to_frame(changed, resolution, frame_chunks[0].dtypes)])
+
+    return new_chunks
@@ -0,0 +1,149 @@
+/*
+    File name: clientside.js
+    Purpose: Contains the clientside callbacks of the Dash app.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+
+    This file provides the callbacks run in the browser, without a round trip to the server.
+    Dash serves it automatically from the assets folder.
+*/
+
+// Matrix decoded from the last hourly matrix received, reused while the data does not change
+var decodedMatrix = {source: null, values: null};
+
+// Function to decode base64 little-endian float32 values
+function decodeFloat32(values) {
+    var binary = window.atob(values);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return new Float32Array(bytes.buffer);
+}
+
+// Function to decode the hourly matrix of the drill-down store
+function decodeHourlyMatrix(matrix) {
+    if (decodedMatrix.source !== matrix.values) {
+        decodedMatrix = {source: matrix.values, values: decodeFloat32(matrix.values)};
+    }
+    return decodedMatrix.values;
+}
+
+// Function to decode a 7 x weeks heatmap matrix into rows, with null for the days without data
+function decodeHeatmapMatrix(values, weeks) {
+    var flat = decodeFloat32(values);
+    var rows = [];
+    for (var day = 0; day < 7; day++) {
+        var row = [];
+        for (var week = 0; week < weeks; week++) {
+            var value = flat[day * weeks + week];
+            row.push(isNaN(value) ? null : value);
+        }
+        rows.push(row);
+    }
+    return rows;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    heatmap: {
+        // Render the heatmap of the selected zone from the matrices of the heatmap store
+        renderHeatmap: function(zone, store) {
+            if (!store) {
+                return {};
+            }
+            var zoneData = store.zones[zone] || store.zones[store.default_zone];
+            return {
+                data: store.figure.data.map(function(trace, i) {
+                    return Object.assign({}, trace, {z: decodeHeatmapMatrix(zoneData.z[i], store.weeks[i])});
+                }),
+                layout: Object.assign({}, store.figure.layout, {
+                    title: Object.assign({}, store.figure.layout.title, {text: zoneData.title})
+                })
+            };
+        }
+    },
+    drilldown: {
+        // Render the hourly bar chart of the heatmap cell that was clicked, for the selected zone
+        renderBarChart: function(clickData, store, zone) {
+            var hidden = {'visibility': 'hidden'};
+            if (!clickData || !clickData.points || !clickData.points.length || !store) {
+                return [{}, hidden];
+            }
+            // The customdata of a heatmap cell is its date, or a list starting with it
+            var customdata = clickData.points[0].customdata;
+            if (Array.isArray(customdata)) {
+                customdata = customdata[0];
+            }
+            if (!customdata) {
+                return [{}, hidden];
+            }
+            var date = String(customdata).slice(0, 10);
+            var parts = date.split('-');
+            var dayKey = Date.UTC(+parts[0], +parts[1] - 1, +parts[2]) / 86400000;
+
+            var matrix = store.matrix;
+            var values = decodeHourlyMatrix(matrix);
+            var zones = matrix.zones.length;
+            var zoneIndex = matrix.zones.indexOf(zone);
+            if (zoneIndex < 0) {
+                zoneIndex = matrix.zones.indexOf(store.zone);
+            }
+            var day = dayKey - matrix.first_day_key;
+
+            // Keep the hours with data, numbered from 1 like the hour dimension
+            var x = [];
+            var y = [];
+            if (day >= 0 && day < matrix.days) {
+                for (var hour = 0; hour < 24; hour++) {
+                    var value = values[(day * 24 + hour) * zones + zoneIndex];
+                    if (!isNaN(value)) {
+                        x.push(hour + 1);
+                        y.push(value);
+                    }
+                }
+            }
+
+            var figure = {
+                data: [Object.assign({}, store.figure.data[0], {x: x, y: y})],
+                layout: Object.assign({}, store.figure.layout, {
+                    title: Object.assign({}, store.figure.layout.title, {text: 'Power Consumption for ' + date})
+                })
+            };
+            return [figure, {'visibility': 'visible', 'padding': '10px', 'width': '80%', 'margin': 'auto'}];
+        }
+    },
+    scatter3zones: {
+        // Merge the x values, hover template and titles of the selected column into the skeleton
+        // of the 3-zone scatter plot; the three zones share the x values and the dates
+        renderScatter: function(update, store) {
+            if (!update || !store) {
+                return {};
+            }
+            if (update.version !== store.version) {
+                // The data was reloaded: wait for the update matching the new skeleton
+                return window.dash_clientside.no_update;
+            }
+
+            var x = decodeFloat32(update.x);
+            var layout = store.figure.layout;
+            return {
+                data: store.figure.data.map(function(trace) {
+                    return Object.assign({}, trace, {
+                        x: x,
+                        customdata: store.dates,
+                        hovertemplate: update.hovertemplate
+                    });
+                }),
+                layout: Object.assign({}, layout, {
+                    title: Object.assign({}, layout.title, {text: update.title}),
+                    xaxis: Object.assign({}, layout.xaxis, {
+                        title: Object.assign({}, layout.xaxis.title, {text: update.x_title})
+                    })
+                })
+            };
+        }
+    }
+});
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: background.py
+    Purpose: Contains the job manager of the callbacks run in the background.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to run expensive callbacks as background jobs of Dash,
+    in a separate process managed through a local disk cache, without an external broker: the
+    request thread is released at once, the page polls the job for its progress and its result,
+    and a job is cancelled when the inputs it was started from change. The results of the jobs are
+    cached on disk for the current data, so a repeated selection is answered without a new job.
+
+    Each job starts a process, which costs more than building the charts of the one year of the
+    bundled data on the request thread, so background jobs are disabled by default: set
+    POWER_BACKGROUND=1 to enable them for data spanning several years. They need the diskcache,
+    multiprocess and psutil packages (pip install "dash[diskcache]"); without them the callbacks
+    run on the request thread as usual. Set POWER_BACKGROUND_EXPIRE to change the lifetime of the
+    cached results.
+'''
+
+import logging
+import os
+
+import cache
+import globals  # pylint: disable=redefined-builtin
+import resultcache
+
+# Whether the expensive callbacks run as background jobs, when the job manager is available
+ENABLED = os.environ.get('POWER_BACKGROUND', '0') == '1'
+
+# Directory of the disk cache of the jobs and their results
+JOBS_DIR = os.path.join(cache.CACHE_DIR, 'jobs')
+
+# Seconds a job result stays cached
+EXPIRE = int(os.environ.get('POWER_BACKGROUND_EXPIRE', '3600'))
+
+logger = logging.getLogger(__name__)
+
+
+# Function to create the job manager of the background callbacks
+def get_manager():
+    """
+    Create the job manager of the background callbacks, with a disk cache of their results keyed
+    by the current data.
+
+    Returns:
+        DiskcacheManager: The job manager, or None if background callbacks are disabled or their
+            dependencies are not installed.
+    """
+    if not ENABLED:
+        return None
+    try:
+        import diskcache  # pylint: disable=import-outside-toplevel
+        from dash import DiskcacheManager  # pylint: disable=import-outside-toplevel
+
+        # A new data file or appended readings change the key of the cached results; the manager
+        # raises ImportError when multiprocess or psutil are missing
+        return DiskcacheManager(diskcache.Cache(JOBS_DIR), expire=EXPIRE,
+                                cache_by=[lambda: resultcache.get_data_key(globals.get_dataset())])
+    except ImportError as error:
+        logger.warning('Background callbacks disabled, running them on the request thread: %s', error)
+        return None
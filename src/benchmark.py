@@ -0,0 +1,630 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: benchmark.py
+    Purpose: Contains benchmarks for the data loading and figure building code paths.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides command line benchmarks comparing the optimized code paths with the
+    original ones. Run it from the src directory, e.g. `python benchmark.py ingestion`.
+'''
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import aggregate
+import BarChart as bc
+import BubblePlot as bp
+import clusteredBarChart as cbc
+import downsample
+import globals  # pylint: disable=redefined-builtin
+import hover_template as hover
+import lineChart as lc
+import offload
+import precompute
+import preprocess
+import ScatterPlotChart as spc
+import serialize
+
+# Define the file path for the data
+file_path = './assets/data/powerconsumption.csv'
+
+
+def _time_call(function, *args, repeat=1, **kwargs):
+    """
+    Measure the best wall-clock time of a function call.
+
+    Parameters:
+        function (callable): The function to time.
+        repeat (int): The number of times to call the function.
+
+    Returns:
+        tuple: The best time in seconds and the result of the last call.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _print_table(header, rows):
+    """
+    Print a list of rows as an aligned text table.
+
+    Parameters:
+        header (list): The column titles.
+        rows (list): The rows of the table.
+    """
+    widths = [max(len(str(value)) for value in column) for column in zip(header, *rows)]
+    for row in [header, *rows]:
+        print('  '.join(str(value).rjust(width) for value, width in zip(row, widths)))
+
+
+def make_synthetic_copy(source_path, scale, directory):
+    """
+    Write a CSV file containing the source data rows repeated a number of times.
+
+    Parameters:
+        source_path (str): The file path to the source CSV file.
+        scale (int): The number of copies of the data rows.
+        directory (str): The directory in which to write the copy.
+
+    Returns:
+        str: The file path to the synthetic CSV file.
+    """
+    with open(source_path, 'r', encoding='utf-8') as source:
+        header = source.readline()
+        body = source.read()
+    if not body.endswith('\n'):
+        body += '\n'
+
+    path = os.path.join(directory, f'powerconsumption_x{scale}.csv')
+    with open(path, 'w', encoding='utf-8') as copy:
+        copy.write(header)
+        for _ in range(scale):
+            copy.write(body)
+    return path
+
+
+def legacy_read_raw_data(path):
+    """
+    Read the raw data the way data_preprocess originally did, with inferred types and datetimes.
+
+    Parameters:
+        path (str): The file path to the CSV file.
+
+    Returns:
+        DataFrame: The raw data.
+    """
+    df = pd.read_csv(path)
+    df['datetime'] = pd.to_datetime(df['Datetime'])
+    return df
+
+
+def benchmark_ingestion(scales):
+    """
+    Compare the typed CSV ingestion path with the original one on synthetic copies of the data.
+
+    Parameters:
+        scales (list): The numbers of copies of the data to benchmark.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            path = make_synthetic_copy(file_path, scale, directory)
+            size_mb = os.path.getsize(path) / 1e6
+
+            legacy_time, legacy_df = _time_call(legacy_read_raw_data, path)
+            typed_c_time, _ = _time_call(preprocess.read_raw_data, path, engine='c')
+            typed_time, typed_df = _time_call(preprocess.read_raw_data, path)
+
+            # Both paths must agree on the parsed timestamps
+            assert legacy_df['datetime'].equals(typed_df['datetime'])
+
+            rows.append([
+                f'x{scale}', len(typed_df), f'{size_mb:.1f}', f'{legacy_time:.2f}', f'{typed_c_time:.2f}',
+                f'{typed_time:.2f}', f'{legacy_time / typed_time:.1f}x'
+            ])
+            os.remove(path)
+
+    engine = 'pyarrow' if preprocess.HAS_PYARROW else 'c'
+    print(f'CSV ingestion (default typed engine: {engine})')
+    _print_table(['scale', 'rows', 'MB', 'legacy (s)', 'typed c (s)', 'typed (s)', 'speedup'], rows)
+
+
+def make_multi_year_frame(df, years):
+    """
+    Build a preprocessed frame spanning several years by shifting copies of the data.
+
+    Parameters:
+        df (DataFrame): The preprocessed data DataFrame.
+        years (int): The number of shifted copies.
+
+    Returns:
+        DataFrame: The multi-year preprocessed frame.
+    """
+    copies = []
+    for year in range(years):
+        # Shift by whole weeks so that the weekly pattern of the data is preserved
+        offset = 364 * year
+        copy = df.copy()
+        copy['day_key'] = (copy['day_key'] + offset).astype('int32')
+        copy['datetime'] = copy['datetime'] + pd.Timedelta(days=offset)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def legacy_aggregate(df):
+    """
+    Aggregate the data the way get_HourlyData and get_DailyData originally did, grouping on the labels.
+
+    Parameters:
+        df (DataFrame): The preprocessed data DataFrame.
+
+    Returns:
+        tuple: The hourly and daily aggregated data.
+    """
+    labels = ['date', 'week', 'DayName', 'MonthName', 'MonthNumber', 'DayOfMonth', 'DayOfYear', 'day_of_week']
+    df = preprocess.attach_calendar(df, labels + ['hourNo'])
+    df['DayName'] = df['DayName'].astype(str)
+    df['MonthName'] = df['MonthName'].astype(str)
+    df['weekofyear'] = df['week']
+    aggregations = {**{col: 'mean' for col in aggregate.COLUMNS_TO_AVG},
+                    **{col: 'max' for col in aggregate.COLUMNS_TO_MAX}}
+
+    hourly = df.groupby(labels + ['hour', 'hourNo', 'weekofyear']).agg(aggregations).reset_index()
+    daily = df.groupby(labels).agg(aggregations).reset_index()
+    return hourly, daily
+
+
+def benchmark_aggregation(scales):
+    """
+    Compare the bucket aggregation engine with groupby aggregations on multi-year data.
+
+    Parameters:
+        scales (list): The numbers of years of data to benchmark.
+    """
+    df = preprocess.data_preprocess(file_path)
+    aggregations = {**{col: 'mean' for col in aggregate.COLUMNS_TO_AVG},
+                    **{col: 'max' for col in aggregate.COLUMNS_TO_MAX}}
+
+    rows = []
+    for scale in scales:
+        frame = make_multi_year_frame(df, scale)
+
+        legacy_time, _ = _time_call(legacy_aggregate, frame)
+        groupby_time, (hourly, _) = _time_call(
+            lambda data: (data.groupby(['day_key', 'hour']).agg(aggregations).reset_index(),
+                          data.groupby('day_key').agg(aggregations).reset_index()), frame, repeat=3)
+        engine_time, frames = _time_call(aggregate.aggregate, frame, ['hour', 'day'], repeat=3)
+        all_time, _ = _time_call(aggregate.aggregate, frame, repeat=3)
+
+        # The engine must agree with the groupby aggregation
+        assert np.allclose(hourly[aggregate.COLUMNS_TO_MAX], frames['hour'][aggregate.COLUMNS_TO_MAX])
+
+        rows.append([f'{scale}y', len(frame), f'{legacy_time:.3f}', f'{groupby_time:.3f}', f'{engine_time:.3f}',
+                     f'{all_time:.3f}', f'{legacy_time / engine_time:.1f}x'])
+
+    print('Hourly + daily aggregation (all = 10min, hour, day, week and month in one pass)')
+    _print_table(['years', 'rows', 'legacy (s)', 'int groupby (s)', 'engine (s)', 'engine all (s)', 'speedup'],
+                 rows)
+
+
+def benchmark_memory():
+    """
+    Report the bytes per column of the global DataFrames before and after compaction.
+    """
+    df = preprocess.data_preprocess(file_path)
+    frames = {'df': df, 'df_hourly': preprocess.get_HourlyData(df), 'df_daily': preprocess.get_DailyData(df)}
+
+    for name, frame in frames.items():
+        report = preprocess.memory_report(frame, preprocess.compact_frame(frame))
+        print(f'{name} (bytes)')
+        _print_table(['column', *report.columns], [list(row) for row in report.itertuples()])
+        print()
+
+
+def benchmark_precompute(processes):
+    """
+    Report the cost of precomputing the dropdown figures, and the callback latency it saves.
+
+    Parameters:
+        processes (int): The number of worker processes of the precompute.
+    """
+    from plotly.io.json import to_json_plotly  # pylint: disable=import-outside-toplevel
+
+    data = globals.warm_up(figures=False)
+    frames = {'df': data.df, 'df_hourly': data.df_hourly, 'df_daily': data.df_daily}
+
+    print(f'In process: {precompute.build_figure_table(data, processes=0).report()}')
+    table = precompute.build_figure_table(data, processes=processes)
+    print(f'{processes} processes: {table.report()}')
+    print()
+
+    # Both paths include the JSON encoding of the response done by Dash
+    rows = []
+    for key in precompute.get_figure_keys():
+        live_time, _ = _time_call(lambda: to_json_plotly(precompute.build_figure(frames, key)), repeat=3)
+        lookup_time, _ = _time_call(lambda: to_json_plotly(table.get(*key)), repeat=3)
+        rows.append([*(part or '' for part in key), f'{live_time * 1000:.1f}', f'{lookup_time * 1000:.2f}'])
+
+    print('Callback latency, build and encode (ms)')
+    _print_table(['chart', 'x', 'y', 'live', 'precomputed'], rows)
+
+
+def benchmark_downsampling(scales, max_points):
+    """
+    Compare the figure size and build time of the line chart of the 10-minute data and of the
+    hourly scatter plot, drawn raw or downsampled, on multi-year data.
+
+    Parameters:
+        scales (list): The numbers of years of data to benchmark.
+        max_points (int): The maximum number of points per trace of the downsampled figures.
+    """
+    from plotly.io.json import to_json_plotly  # pylint: disable=import-outside-toplevel
+
+    df = preprocess.data_preprocess(file_path)
+
+    rows = []
+    for scale in scales:
+        frames = aggregate.aggregate(make_multi_year_frame(df, scale), ['10min', 'hour'])
+        ten_minutes = frames['10min'].rename(columns={'datetime': 'date'})
+        hourly = frames['hour']
+
+        charts = [
+            ('line raw', lambda: lc.get_line_data(ten_minutes, max_points=len(ten_minutes))),
+            *[(f'line {method}', lambda method=method: lc.get_line_data(ten_minutes, max_points, method))
+              for method in downsample.METHODS],
+            ('scatter raw', lambda: spc.get_ScatterPlotChart(hourly, 'Humidity', 'WindSpeed')),
+            ('scatter grid', lambda: spc.get_ScatterPlotChart(hourly, 'Humidity', 'WindSpeed', max_points))
+        ]
+        for name, build in charts:
+            build_time, fig = _time_call(build)
+            points = max(len(trace['x']) for trace in fig['data'])
+            size_mb = len(to_json_plotly(fig, engine='json')) / 1e6
+            rows.append([f'{scale}y', name, points, fig['data'][0]['type'], f'{build_time:.3f}', f'{size_mb:.2f}'])
+
+    print(f'Figures of the 10-minute line chart and the hourly scatter plot (max {max_points} points per trace)')
+    _print_table(['years', 'figure', 'points/trace', 'trace', 'build (s)', 'JSON (MB)'], rows)
+
+
+def legacy_bar_chart(HourlyData, date_str, zone_col):
+    """
+    Build the hourly bar chart of a day with plotly express, the way BarChart originally did.
+
+    Parameters:
+        HourlyData (DataFrame): The hourly data.
+        date_str (str): The day, as 'YYYY-MM-DD'.
+        zone_col (str): The zone column to chart.
+
+    Returns:
+        Figure: The bar chart.
+    """
+    import plotly.express as px  # pylint: disable=import-outside-toplevel
+
+    fig = px.bar(bc.to_date_format(HourlyData, date_str), x='hourNo', y=zone_col,
+                 labels={'hourNo': 'Hour', zone_col: 'Power Consumption (KW)'}, title=f'Power Consumption for {date_str}')
+    fig.update(data=[{'hovertemplate': hover.get_barchart_hover_template()}])
+    fig.update_layout(dragmode='pan', xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True))
+    return fig
+
+
+def legacy_bubble_plot(DailyData, x_col, y_col):
+    """
+    Build the bubble plot with plotly express, the way BubblePlot originally did.
+
+    Parameters:
+        DailyData (DataFrame): The daily data.
+        x_col (str): The column on the x-axis.
+        y_col (str): The column on the y-axis.
+
+    Returns:
+        Figure: The bubble plot.
+    """
+    import plotly.express as px  # pylint: disable=import-outside-toplevel
+
+    DailyData = preprocess.attach_calendar(DailyData, ['date'])
+    title = f'Bubble Plot: {x_col} vs. {y_col} with Power Consumption Size'
+    fig = px.scatter(DailyData, x=x_col, y=y_col, size='PowerConsumption_AllZones', color='PowerConsumption_AllZones',
+                     title=title, labels={x_col: x_col.replace('_', ' '), y_col: y_col.replace('_', ' '),
+                                          'PowerConsumption_AllZones': 'Power Consumption'})
+    fig.update_traces(hovertemplate=hover.get_bubble_plot_hover_template(),
+                      customdata=DailyData[['date', *bp.CUSTOMDATA_COLUMNS]])
+    fig.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')), selector=dict(mode='markers'))
+    fig.update_layout(xaxis_title=x_col.replace('_', ' '), yaxis_title=y_col.replace('_', ' '), title=title,
+                      dragmode='pan', xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True))
+    return fig
+
+
+def legacy_line_chart(DailyData_df, max_points):
+    """
+    Build the line chart with plotly express from the long form of the data, the way lineChart
+    originally did.
+
+    Parameters:
+        DailyData_df (DataFrame): The data, sorted by time, with a 'date' column.
+        max_points (int): The maximum number of points per zone.
+
+    Returns:
+        Figure: The line chart.
+    """
+    import plotly.express as px  # pylint: disable=import-outside-toplevel
+
+    time_axis = pd.to_datetime(DailyData_df['date']).to_numpy().astype('int64')
+    frames = []
+    for zone_col in lc.ZONE_COLUMNS:
+        indices = downsample.downsample_indices(time_axis, DailyData_df[zone_col].to_numpy(), max_points)
+        frames.append(pd.DataFrame({'date': DailyData_df['date'].to_numpy()[indices], 'Zone': lc.ZONE_NAMES[zone_col],
+                                    'PowerConsumption': DailyData_df[zone_col].to_numpy()[indices]}))
+    long_df = pd.concat(frames, ignore_index=True)
+
+    fig = px.line(long_df, x='date', y='PowerConsumption', color='Zone', title='Power Consumption Over Time',
+                  labels={'date': 'Date', 'PowerConsumption': 'Power Consumption (kW)'}, line_group='Zone',
+                  hover_name='Zone', hover_data={'PowerConsumption': False, 'Zone': True}, line_dash='Zone',
+                  render_mode=downsample.get_render_mode(len(long_df) // len(lc.ZONE_COLUMNS)))
+    fig.update(data=[{'hovertemplate': '<b>Date</b>: %{x}<br><b>Zone</b>: %{customdata[0]}<br>'
+                                       '<b>Power Consumption</b>: %{y:.2f} W<br><extra></extra>'}])
+    fig.update_layout(yaxis=dict(fixedrange=True), xaxis=dict(fixedrange=True))
+    return fig
+
+
+def legacy_scatter_plot(DailyData, x_col, y_col, max_points):
+    """
+    Build the scatter plot with plotly express, the way ScatterPlotChart originally did.
+
+    Parameters:
+        DailyData (DataFrame): The data.
+        x_col (str): The column on the x-axis.
+        y_col (str): The column on the y-axis.
+        max_points (int): The maximum number of points to draw.
+
+    Returns:
+        Figure: The scatter plot.
+    """
+    import plotly.express as px  # pylint: disable=import-outside-toplevel
+
+    if len(DailyData) > max_points:
+        DailyData = DailyData.iloc[downsample.grid_indices(DailyData[x_col], DailyData[y_col], max_points)]
+    fig = px.scatter(DailyData, x=x_col, y=y_col, title=f'{x_col} vs. {y_col}',
+                     render_mode=downsample.get_render_mode(len(DailyData)))
+    fig.update_layout(dragmode='pan', xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True))
+    fig.update(data=[{'hovertemplate': hover.get_scatterplotchart_hover_template(x_col, y_col)}])
+    return fig
+
+
+def legacy_scatter_3zones(DailyData, x_col):
+    """
+    Build the 3-zone scatter plot with plotly express and graph objects, the way ScatterPlotChart
+    originally did.
+
+    Parameters:
+        DailyData (DataFrame): The daily data.
+        x_col (str): The column on the x-axis.
+
+    Returns:
+        Figure: The 3-zone scatter plot.
+    """
+    import plotly.express as px  # pylint: disable=import-outside-toplevel
+
+    DailyData = preprocess.attach_calendar(DailyData, ['date'])
+    fig = px.scatter(DailyData, x=x_col, y='PowerConsumption_Zone1', title=f'Correlation between {x_col} and Power Consumption',
+                     labels={x_col: x_col, 'PowerConsumption_Zone1': 'Power Consumption'}, opacity=0.7)
+    fig.update_traces(name='Zone 1', customdata=DailyData['date'], showlegend=True, marker=dict(size=8))
+    for zone_col, name in list(spc.THREE_ZONES.items())[1:]:
+        fig.add_scatter(x=DailyData[x_col], y=DailyData[zone_col], mode='markers', name=name,
+                        customdata=DailyData['date'], marker=dict(size=8), showlegend=True)
+    fig.update_layout(
+        legend=dict(title='Zone', orientation='v', yanchor='middle', y=0.5, xanchor='left', x=1.05,
+                    bgcolor='rgba(255, 255, 255, 0.5)', bordercolor='white', borderwidth=1,
+                    font=dict(size=12, color='black')),
+        margin=dict(r=200), xaxis=dict(title=x_col, fixedrange=True),
+        yaxis=dict(title='Power Consumption(w)', fixedrange=True), dragmode='pan')
+    fig.update_traces(marker=dict(symbol='square'))
+    fig.update_traces(hovertemplate=hover.get_scatterplotchartforenergy_hover_template(x_col))
+    return fig
+
+
+def legacy_zone_bar_chart(totals, mask):
+    """
+    Build the bar chart of the power consumption by zone with plotly express, the way
+    clusteredBarChart originally did.
+
+    Parameters:
+        totals (ndarray): The 12 x 3 matrix of the totals of each zone by month.
+        mask (int): The bitmask of the selected months.
+
+    Returns:
+        Figure: The bar chart.
+    """
+    import plotly.express as px  # pylint: disable=import-outside-toplevel
+
+    selected = [(mask >> i) & 1 == 1 for i in range(12)]
+    zone_sums = pd.DataFrame({'Zone': cbc.ZONE_NAMES, 'PowerConsumption': totals[selected].sum(axis=0)})
+    percentages = zone_sums['PowerConsumption'] / zone_sums['PowerConsumption'].sum() * 100
+    zone_sums['Percentage'] = [f'{x:.2f}%' for x in percentages]
+    fig = px.bar(zone_sums, x='Zone', y='PowerConsumption', title='Proportion of Power Consumption by Zone',
+                 color='Zone', text='Percentage', color_discrete_sequence=cbc.ZONE_COLORS,
+                 hover_data={'PowerConsumption': ':.2f', 'Percentage': False},
+                 labels={'PowerConsumption': 'Power Consumption (kWh)'})
+    fig.update_traces(hovertemplate=hover.get_zone_bar_hover_template())
+    fig.update_layout(barmode='stack', xaxis={'categoryorder': 'total descending'})
+    fig.update_layout(font=dict(size=14), xaxis_title=None, legend=dict(font=dict(size=12)))
+    return fig
+
+
+def legacy_month_bar_chart(totals, mask):
+    """
+    Build the stacked bar chart of the power consumption by month with plotly express, the way
+    clusteredBarChart originally did.
+
+    Parameters:
+        totals (ndarray): The 12 x 3 matrix of the totals of each zone by month.
+        mask (int): The bitmask of the selected months.
+
+    Returns:
+        Figure: The stacked bar chart.
+    """
+    import plotly.express as px  # pylint: disable=import-outside-toplevel
+
+    months = [i for i in range(12) if (mask >> i) & 1 and totals[i].any()]
+    consumption = totals[months]
+    percentages = consumption / consumption.sum(axis=1, keepdims=True) * 100
+    melted_df = pd.DataFrame({
+        'MonthName': np.repeat([preprocess.MONTH_NAMES[i] for i in months], len(cbc.ZONE_NAMES)),
+        'Zone': np.tile(cbc.ZONE_NAMES, len(months)),
+        'PowerConsumption': consumption.ravel(),
+        'Percentage': percentages.ravel()
+    })
+    fig = px.bar(melted_df, x='MonthName', y='PowerConsumption', color='Zone',
+                 title='Proportion of Power Consumption by Month', color_discrete_sequence=cbc.ZONE_COLORS,
+                 text='Percentage')
+    fig.update_traces(hovertemplate=hover.get_month_bar_hover_template())
+    fig.update_layout(barmode='stack', xaxis_title=None, legend=dict(font=dict(size=12)), font=dict(size=14))
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='inside')
+    return fig
+
+
+def benchmark_figures(repeat):
+    """
+    Compare the build and encode time of every chart built from NumPy arrays with the figures
+    module against the same chart built with plotly express.
+
+    Parameters:
+        repeat (int): The number of builds of each chart, the best time is kept.
+    """
+    from plotly.io.json import to_json_plotly  # pylint: disable=import-outside-toplevel
+
+    data = globals.warm_up(figures=False)
+    line_frame = lc.LineTiers(data.df, data.df_hourly, data.df_daily).get_window()[1]
+    totals = cbc.get_month_zone_totals(data.df_daily)
+    summer = cbc.get_month_mask(['May', 'June', 'July', 'August'])
+    first_date = str(np.datetime64(int(data.df_daily['day_key'].iloc[0]), 'D'))
+
+    charts = [
+        ('bar', lambda: legacy_bar_chart(data.df_hourly, first_date, bc.DEFAULT_ZONE),
+         lambda: bc.get_bar_chart(data.df_hourly, first_date)),
+        ('bubble', lambda: legacy_bubble_plot(data.df_daily, 'Humidity', 'Temperature'),
+         lambda: bp.get_bubble_plot(data.df_daily, 'Humidity', 'Temperature')),
+        ('line', lambda: legacy_line_chart(line_frame, downsample.MAX_POINTS),
+         lambda: lc.get_line_data(line_frame)),
+        ('scatter', lambda: legacy_scatter_plot(data.df_hourly, 'Humidity', 'Temperature', downsample.MAX_SCATTER_POINTS),
+         lambda: spc.get_ScatterPlotChart(data.df_hourly, 'Humidity', 'Temperature', downsample.MAX_SCATTER_POINTS)),
+        ('scatter 3 zones', lambda: legacy_scatter_3zones(data.df_daily, 'Humidity'),
+         lambda: spc.get_ScatterPlotChart_3Zones('Humidity', data.df_daily)),
+        ('zone bars', lambda: legacy_zone_bar_chart(totals, summer),
+         lambda: cbc.update_stacked_bar_chart_zone(totals, summer)),
+        ('month bars', lambda: legacy_month_bar_chart(totals, summer),
+         lambda: cbc.update_stacked_bar_chart_month(totals, summer))
+    ]
+
+    # Both paths include the JSON encoding of the response done by Dash
+    rows = []
+    for name, legacy_build, build in charts:
+        legacy_time, _ = _time_call(lambda: to_json_plotly(legacy_build()), repeat=repeat)
+        build_time, _ = _time_call(lambda: to_json_plotly(build()), repeat=repeat)
+        rows.append([name, f'{legacy_time * 1000:.1f}', f'{build_time * 1000:.1f}', f'{legacy_time / build_time:.1f}x'])
+
+    print('Figure build and encode (ms)')
+    _print_table(['chart', 'plotly express', 'figures', 'speedup'], rows)
+
+
+def benchmark_offload(thread_counts, requests, processes):
+    """
+    Compare the throughput of concurrent zooms of the line chart built on the request threads and
+    built in a pool of worker processes.
+
+    Parameters:
+        thread_counts (list): The numbers of concurrent request threads.
+        requests (int): The number of zooms per measure.
+        processes (int): The number of worker processes of the pool.
+    """
+    from plotly.io.json import to_json_plotly  # pylint: disable=import-outside-toplevel
+
+    data = globals.warm_up(figures=False)
+    tiers = lc.LineTiers(data.df, data.df_hourly, data.df_daily)
+
+    # Windows of 2 to 30 days spread over the data, as many distinct zooms
+    rng = np.random.default_rng(0)
+    first, last = tiers.frames['10min']['date'].iloc[0], tiers.frames['10min']['date'].iloc[-1]
+    starts = first + (last - first - pd.Timedelta(days=30)) * rng.random(requests)
+    windows = [(str(start), str(start + pd.Timedelta(days=int(days))))
+               for start, days in zip(starts, rng.integers(2, 31, requests))]
+
+    # Both paths include the JSON encoding of the response done by Dash
+    def inline(window):
+        return to_json_plotly(serialize.compact_figure(tiers.get_figure(*window)))
+
+    def offloaded(window):
+        return to_json_plotly(offload.run('line_window', *window))
+
+    offload.PROCESSES = processes
+    offloaded(windows[0])  # Start the pool and publish the frames
+
+    rows = []
+    for threads in thread_counts:
+        with ThreadPoolExecutor(threads) as executor:
+            inline_time, _ = _time_call(lambda: list(executor.map(inline, windows)))
+            offload_time, _ = _time_call(lambda: list(executor.map(offloaded, windows)))
+        rows.append([threads, f'{requests / inline_time:.0f}', f'{requests / offload_time:.0f}'])
+    offload.shutdown()
+
+    print(f'Line chart zooms per second, {processes} worker processes')
+    _print_table(['threads', 'request threads', 'process pool'], rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the data loading and figure building code paths.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    ingestion_parser = subparsers.add_parser('ingestion', help='typed CSV ingestion against the original one')
+    ingestion_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+
+    subparsers.add_parser('memory', help='bytes per column of the DataFrames before and after compaction')
+
+    aggregation_parser = subparsers.add_parser('aggregation', help='bucket aggregation engine against groupby')
+    aggregation_parser.add_argument('--scales', type=int, nargs='+', default=[1, 5, 20])
+
+    precompute_parser = subparsers.add_parser('precompute', help='precomputed dropdown figures against live builds')
+    precompute_parser.add_argument('--processes', type=int, default=precompute.PROCESSES)
+
+    downsampling_parser = subparsers.add_parser('downsampling', help='downsampled figures against raw ones')
+    downsampling_parser.add_argument('--scales', type=int, nargs='+', default=[1, 5, 20])
+    downsampling_parser.add_argument('--max-points', type=int, default=downsample.MAX_POINTS)
+
+    figures_parser = subparsers.add_parser('figures', help='figures built from arrays against plotly express')
+    figures_parser.add_argument('--repeat', type=int, default=5)
+
+    offload_parser = subparsers.add_parser('offload', help='figure builders on request threads against a process pool')
+    offload_parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    offload_parser.add_argument('--requests', type=int, default=200)
+    offload_parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+
+    arguments = parser.parse_args()
+    if arguments.benchmark == 'ingestion':
+        benchmark_ingestion(arguments.scales)
+    elif arguments.benchmark == 'memory':
+        benchmark_memory()
+    elif arguments.benchmark == 'aggregation':
+        benchmark_aggregation(arguments.scales)
+    elif arguments.benchmark == 'precompute':
+        benchmark_precompute(arguments.processes)
+    elif arguments.benchmark == 'downsampling':
+        benchmark_downsampling(arguments.scales, arguments.max_points)
+    elif arguments.benchmark == 'figures':
+        benchmark_figures(arguments.repeat)
+    elif arguments.benchmark == 'offload':
+        benchmark_offload(arguments.threads, arguments.requests, arguments.processes)
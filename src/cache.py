@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: cache.py
+    Purpose: Contains functions to persist the preprocessed data on disk between server starts.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides a columnar on-disk cache for the output of the preprocessing step, keyed by
+    the content of the source CSV file and the preprocessing version. Only the frames of the
+    KEEP_ENTRIES most recently stored keys are kept; set POWER_CACHE_KEEP to change it.
+'''
+
+import hashlib
+import os
+import re
+import shutil
+
+import pandas as pd
+
+import preprocess
+
+try:
+    from pyarrow import feather
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Directory where the cached frames are stored
+CACHE_DIR = './assets/cache'
+
+# Names of the cached frames
+FRAME_NAMES = ('df', 'df_hourly', 'df_daily')
+
+# Number of cache keys whose frames are kept, so that the previous data stays cached during a reload
+KEEP_ENTRIES = int(os.environ.get('POWER_CACHE_KEEP', '2'))
+
+# Name of the directory of the frames of a cache key, to tell them from the other caches in CACHE_DIR
+ENTRY_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+# Function to compute the cache key of a data file
+def get_cache_key(file_path, compact=False):
+    """
+    Compute the cache key of a data file from its content and the preprocessing version.
+
+    Parameters:
+        file_path (str): The file path to the CSV file.
+        compact (bool): Whether the frames are stored in compact form.
+
+    Returns:
+        str: The hexadecimal cache key.
+    """
+    digest = hashlib.sha256()
+    digest.update(f'preprocess-v{preprocess.PREPROCESS_VERSION}-compact{int(compact)}'.encode('utf-8'))
+
+    # Hash the file by blocks so that large exports do not have to fit in memory
+    with open(file_path, 'rb') as data_file:
+        for block in iter(lambda: data_file.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _get_frame_path(cache_key, name):
+    """
+    Get the path of a cached frame.
+
+    Parameters:
+        cache_key (str): The cache key of the data file.
+        name (str): The name of the frame.
+
+    Returns:
+        str: The path of the cached frame.
+    """
+    extension = 'feather' if HAS_PYARROW else 'pkl'
+    return os.path.join(CACHE_DIR, cache_key, f'{name}.{extension}')
+
+
+def _write_frame(frame, path):
+    """
+    Write a frame to the cache.
+
+    Parameters:
+        frame (DataFrame): The frame to write.
+        path (str): The destination path.
+    """
+    if HAS_PYARROW:
+        frame.reset_index(drop=True).to_feather(path)
+    else:
+        frame.to_pickle(path)
+
+
+def _read_frame(path):
+    """
+    Read a frame from the cache.
+
+    Parameters:
+        path (str): The path of the cached frame.
+
+    Returns:
+        DataFrame: The cached frame.
+    """
+    if HAS_PYARROW:
+        # Memory-map the file so that the Arrow table is not read into memory first; to_pandas still
+        # copies every column into the frame, which the server uses whole
+        return feather.read_table(path, memory_map=True).to_pandas()
+    return pd.read_pickle(path)
+
+
+# Function to load a cached frame of a data file
+def load_cached(cache_key, name):
+    """
+    Load a preprocessed frame of a data file from the cache.
+
+    Parameters:
+        cache_key (str): The cache key of the data file.
+        name (str): The name of the frame, one of FRAME_NAMES.
+
+    Returns:
+        DataFrame: The cached frame, or None if the cache is cold.
+    """
+    path = _get_frame_path(cache_key, name)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return _read_frame(path)
+    except Exception:  # pylint: disable=broad-except
+        # A corrupted or incompatible cache entry is treated as a miss
+        return None
+
+
+def _prune_entries(cache_key):
+    """
+    Delete the frames of the cache keys other than the KEEP_ENTRIES most recently stored ones.
+
+    Parameters:
+        cache_key (str): The cache key of the data file just stored, always kept.
+    """
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        if entry.name != cache_key and ENTRY_PATTERN.fullmatch(entry.name) and entry.is_dir():
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass  # Deleted by another process meanwhile
+
+    # Processes still holding the frames of a deleted key keep reading them from memory
+    for _, path in sorted(entries, reverse=True)[max(KEEP_ENTRIES - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Function to store a preprocessed frame of a data file
+def store_cached(cache_key, name, frame):
+    """
+    Store a preprocessed frame of a data file in the cache.
+
+    Parameters:
+        cache_key (str): The cache key of the data file.
+        name (str): The name of the frame, one of FRAME_NAMES.
+        frame (DataFrame): The frame to store.
+    """
+    os.makedirs(os.path.join(CACHE_DIR, cache_key), exist_ok=True)
+    path = _get_frame_path(cache_key, name)
+
+    # Write to a temporary file first so that concurrent workers never read a partial file
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    _write_frame(frame, tmp_path)
+    os.replace(tmp_path, path)
+
+    _prune_entries(cache_key)
+
+
+# Function to load a preprocessed frame, building it on a cache miss
+def load_or_build(cache_key, name, build):
+    """
+    Load a preprocessed frame of a data file, building it on a cache miss.
+
+    Parameters:
+        cache_key (str): The cache key of the data file.
+        name (str): The name of the frame, one of FRAME_NAMES.
+        build (callable): Builds the frame when it is not cached.
+
+    Returns:
+        DataFrame: The preprocessed frame.
+    """
+    frame = load_cached(cache_key, name)
+    if frame is not None:
+        return frame
+
+    frame = build()
+    try:
+        store_cached(cache_key, name, frame)
+    except OSError:
+        # A read-only deployment can still serve the freshly built frame
+        pass
+
+    return frame
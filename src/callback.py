@@ -11,47 +11,24 @@
     This file provides the functionality to process user interactions and update the app's visualizations.
 '''
 
-from datetime import datetime, timedelta
-
-
-# Function to map click data to a specific date
-def get_date_from_click(click_data):
+# Function to get the time window selected by zooming on a chart
+def get_range_from_relayout(relayout_data):
     """
-    Convert heatmap click data to a date.
+    Get the x-axis range of a chart from its relayout data.
 
     Parameters:
-        click_data (dict): Data from a heatmap click event.
+        relayout_data (dict): Data from a relayout event.
 
     Returns:
-        str: Date string in the format 'YYYY-MM-DD' or None if click_data is invalid.
+        tuple: The start and end of the range, (None, None) when the range was reset, or None if
+            the event did not change the x-axis range.
     """
-    # Map of day names to integers
-    day_map = {
-        'Sunday': 0,
-        'Monday': 1,
-        'Tuesday': 2,
-        'Wednesday': 3,
-        'Thursday': 4,
-        'Friday': 5,
-        'Saturday': 6
-    }
-
-    # Check if click data is valid
-    if click_data and 'points' in click_data:
-        point = click_data['points'][0]
-        week_of_year = point['x']
-        day_of_week = point['y']
-
-        # Map day name to integer
-        day_of_week_index = day_map[day_of_week]
-
-        # Start date for 2017
-        start_date = datetime.strptime('2017-01-01', '%Y-%m-%d')
-
-        # Calculate the first day of the specified week
-        days_to_add = (week_of_year - 1) * 7 + day_of_week_index  # week_of_year - 1 because weeks are 0-indexed
-        specific_date = start_date + timedelta(days=days_to_add)
-
-        return specific_date.strftime('%Y-%m-%d')
-    
-    return None
\ No newline at end of file
+    if not relayout_data:
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    if relayout_data.get('xaxis.autorange'):
+        return None, None
+    return None
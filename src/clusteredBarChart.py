@@ -11,174 +11,184 @@
     Python Version: 3.8
 
     This file provides functionality to generate clustered bar charts for power consumption data across different zones.
+    Both charts are answered from a 12-month x 3-zone matrix of the totals of the daily maxima, built
+    once per version of the data, and the figures of each selection of months are cached.
 '''
 
-import pandas as pd
-import plotly.express as px
+import threading
 
-from globals import df
+import numpy as np
 
+import figures
+import hover_template as hover
+import preprocess
+import serialize
 
-def update_stacked_bar_chart_zone(DailyData_df, selected_months):
+# Names of the zones in the charts
+ZONE_NAMES = list(preprocess.ZONE_ALIASES.values())
+
+# Colors of the zones, a sequence suitable for color blindness
+ZONE_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c']
+
+
+# Function to compute the totals of the daily maxima of each zone by month
+def get_month_zone_totals(DailyData_df):
     """
-    Update the stacked bar chart for power consumption by zone.
+    Sum the daily maxima of each zone by month of the year, over all the years of the data.
 
     Parameters:
-        DailyData_df (DataFrame): The daily data DataFrame containing power consumption data.
-        selected_months (list): List of selected months to filter the data.
+        DailyData_df (DataFrame): The daily data DataFrame.
 
     Returns:
-        Figure: Plotly Figure object representing the stacked bar chart for power consumption by zone.
+        ndarray: The 12 x 3 matrix of the totals, in calendar order of the months.
     """
-    # Filter the DataFrame based on selected months
-    filtered_df = DailyData_df[DailyData_df['MonthName'].isin(selected_months)]
+    months = preprocess.attach_calendar(DailyData_df[['day_key']], ['MonthNumber'])['MonthNumber'].to_numpy() - 1
+    zones = preprocess.zone_aliases(DailyData_df)
+    return np.column_stack([
+        np.bincount(months, weights=zones[zone].to_numpy(dtype='float64'), minlength=12)
+        for zone in ZONE_NAMES
+    ])
 
-    # Sum the power consumption for each zone
-    zone_sums = filtered_df[['Zone1', 'Zone2', 'Zone3']].sum().reset_index()
-    zone_sums.columns = ['Zone', 'PowerConsumption']
 
-    # Calculate the percentage of each zone from the whole zones
-    zone_sums['Percentage'] = zone_sums['PowerConsumption'] / zone_sums['PowerConsumption'].sum() * 100
-    zone_sums['Percentage'] = zone_sums['Percentage'].apply(lambda x: '{:.2f}%'.format(x))  # Format to two decimal places
-
-    # Define a color sequence suitable for color blindness
-    color_sequence = ['#1f77b4', '#ff7f0e', '#2ca02c']
-
-    # Create a stacked bar chart with Plotly
-    fig = px.bar(zone_sums, x='Zone', y='PowerConsumption', title='Proportion of Power Consumption by Zone',
-                 color='Zone', text='Percentage', color_discrete_sequence=color_sequence,
-                 hover_data={'PowerConsumption': ':.2f', 'Percentage': False},
-                 labels={'PowerConsumption': 'Power Consumption (kWh)'})
-
-    # Define hover template
-    hover_template = (
-        '<b>Zone:</b> %{x}<br>'
-        '<b>Power Consumption:</b> %{y:.2f}W<br>'
-        '<extra></extra>'  # This removes the secondary box with extra data
-    )
-
-    # Update the trace to use the custom hover template
-    fig.update_traces(hovertemplate=hover_template)
+# Function to encode a selection of months as a bitmask
+def get_month_mask(selected_months):
+    """
+    Encode a selection of months as a 12-bit mask, bit i standing for the i-th month of the year.
 
-    # Update layout for better readability
-    fig.update_layout(barmode='stack', xaxis={'categoryorder': 'total descending'})
-    fig.update_layout(font=dict(size=14), xaxis_title=None, legend=dict(
-            font=dict(size=12)))
+    Parameters:
+        selected_months (list): The names of the selected months.
 
-    return fig
+    Returns:
+        int: The bitmask.
+    """
+    return sum(1 << i for i, month in enumerate(preprocess.MONTH_NAMES) if month in selected_months)
 
 
-def get_clustered_bar_chart_zone(selected_months):
+def update_stacked_bar_chart_zone(totals, mask):
     """
-    Generate a clustered bar chart for power consumption by zone.
+    Update the stacked bar chart for power consumption by zone.
 
     Parameters:
-        selected_months (list): List of selected months to filter the data.
+        totals (ndarray): The 12 x 3 matrix of the totals of each zone by month.
+        mask (int): The bitmask of the selected months.
 
     Returns:
-        Figure: Plotly Figure object representing the clustered bar chart for power consumption by zone.
+        dict: The figure of the stacked bar chart for power consumption by zone.
     """
-    # Columns to average and to find the maximum
-    columns_to_avg = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows']
-    columns_to_max = ['Zone1', 'Zone2', 'Zone3', 'PowerConsumption_AllZones']
+    # Sum the power consumption of the selected months for each zone
+    selected = [(mask >> i) & 1 == 1 for i in range(12)]
+    zone_sums = totals[selected].sum(axis=0)
 
-    # Group by specified columns and aggregate
-    DailyData_df = df.groupby(['date', 'week', 'DayName', 'MonthName', 'MonthNumber', 'DayOfMonth', 'DayOfYear']).agg(
-        {**{col: 'mean' for col in columns_to_avg}, **{col: 'max' for col in columns_to_max}}
-    ).reset_index()
+    # Calculate the percentage of each zone from the whole zones
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percentages = zone_sums / zone_sums.sum() * 100
+
+    # Create a bar per zone, stacked on its own category
+    traces = [
+        figures.bar(
+            [zone], [zone_sum],
+            name=zone,
+            marker=dict(color=color),
+            text=[f'{percentage:.2f}%'],  # Format to two decimal places
+            showlegend=True,
+            hovertemplate=hover.get_zone_bar_hover_template()
+        )
+        for zone, color, zone_sum, percentage in zip(ZONE_NAMES, ZONE_COLORS, zone_sums, percentages)
+    ]
 
-    return update_stacked_bar_chart_zone(DailyData_df, selected_months)
+    # Update layout for better readability
+    return figures.figure(
+        traces,
+        title='Proportion of Power Consumption by Zone',
+        xaxis=figures.axis(None, categoryorder='total descending'),
+        yaxis=figures.axis('Power Consumption (kWh)'),
+        barmode='stack',
+        font=dict(size=14),
+        legend=dict(title=dict(text='Zone'), font=dict(size=12))
+    )
 
 
-def update_stacked_bar_chart_month(DailyData_df, selected_months):
+def update_stacked_bar_chart_month(totals, mask):
     """
     Update the stacked bar chart for power consumption by month.
 
     Parameters:
-        DailyData_df (DataFrame): The daily data DataFrame containing power consumption data.
-        selected_months (list): List of selected months to filter the data.
+        totals (ndarray): The 12 x 3 matrix of the totals of each zone by month.
+        mask (int): The bitmask of the selected months.
 
     Returns:
-        Figure: Plotly Figure object representing the stacked bar chart for power consumption by month.
+        dict: The figure of the stacked bar chart for power consumption by month.
     """
-    # Filter the DataFrame based on selected months
-    filtered_df = DailyData_df[DailyData_df['MonthName'].isin(selected_months)]
-
-    # Calculate the total power consumption for each zone and each month
-    monthly_consumption = filtered_df.groupby('MonthName')[['Zone1', 'Zone2', 'Zone3']].sum().reset_index()
-
-    # Calculate the percentages
-    monthly_consumption['Total'] = monthly_consumption[['Zone1', 'Zone2', 'Zone3']].sum(axis=1)
-    monthly_consumption['Zone1_pct'] = (monthly_consumption['Zone1'] / monthly_consumption['Total']) * 100
-    monthly_consumption['Zone2_pct'] = (monthly_consumption['Zone2'] / monthly_consumption['Total']) * 100
-    monthly_consumption['Zone3_pct'] = (monthly_consumption['Zone3'] / monthly_consumption['Total']) * 100
-
-    # Melt the DataFrame for plotting
-    melted_df = monthly_consumption.melt(id_vars='MonthName', value_vars=['Zone1', 'Zone2', 'Zone3'],
-                                         var_name='Zone', value_name='PowerConsumption')
-    melted_df['Percentage'] = melted_df.apply(lambda row:
-                                              (row['PowerConsumption'] / monthly_consumption[
-                                                  monthly_consumption['MonthName'] == row['MonthName']][
-                                                  'Total'].values[0]) * 100, axis=1)
-
-    # Define a color sequence suitable for color blindness
-    color_sequence = ['#1f77b4', '#ff7f0e', '#2ca02c']
-
-    # Ensure 'MonthName' is categorical and ordered correctly
-    month_order = ['January', 'February', 'March', 'April', 'May', 'June',
-                   'July', 'August', 'September', 'October', 'November', 'December']
-
-    melted_df['MonthName'] = pd.Categorical(melted_df['MonthName'], categories=month_order, ordered=True)
-
-    # Now, plot the sorted data
-    fig = px.bar(
-        melted_df.sort_values(by='MonthName'),  # Sort by 'MonthName'
-        x='MonthName',
-        y='PowerConsumption',
-        color='Zone',
-        title='Proportion of Power Consumption by Month',
-        color_discrete_sequence=color_sequence,
-        text='Percentage'
-    )
-
-    # Define hover template with custom formatting
-    hover_template = (
-            '<b>Month:</b> %{x}<br>' +
-            '<b>Power Consumption:</b> %{y:.2f}W<br>' +
-            '<b>Percentage:</b> %{text:.2f}%<br>' +
-            '<extra></extra>'
-    )
-
-    # Update figure with custom hover template
-    fig.update_traces(hovertemplate=hover_template)
+    # Keep the selected months that have data, in calendar order
+    months = [i for i in range(12) if (mask >> i) & 1 and totals[i].any()]
+    consumption = totals[months]
+    month_names = [preprocess.MONTH_NAMES[i] for i in months]
+
+    # Calculate the percentage of each zone in the total of its month
+    percentages = consumption / consumption.sum(axis=1, keepdims=True) * 100
+
+    # Stack the bars of the zones of each month
+    traces = [
+        figures.bar(
+            month_names, consumption[:, i],
+            name=zone,
+            marker=dict(color=color),
+            text=percentages[:, i],
+            texttemplate='%{text:.1f}%',  # Percentage display
+            textposition='inside',
+            showlegend=True,
+            hovertemplate=hover.get_month_bar_hover_template()
+        )
+        for i, (zone, color) in enumerate(zip(ZONE_NAMES, ZONE_COLORS))
+    ]
 
     # Update layout for better readability
-    fig.update_layout(barmode='stack', xaxis_title=None, legend=dict(
-            font=dict(size=12)), font=dict(size=14))
-
-    # Update text template for percentage display
-    fig.update_traces(texttemplate='%{text:.1f}%', textposition='inside')
-
-    return fig
+    return figures.figure(
+        traces,
+        title='Proportion of Power Consumption by Month',
+        xaxis=figures.axis(None),
+        yaxis=figures.axis('PowerConsumption'),
+        barmode='stack',
+        font=dict(size=14),
+        legend=dict(title=dict(text='Zone'), font=dict(size=12))
+    )
 
 
-def get_stacked_bar_chart_month(selected_months):
+class MonthlyCharts:
     """
-    Generate a stacked bar chart for power consumption by month.
+    Charts of the power consumption of the selected months, answered from the month x zone totals.
 
-    Parameters:
-        selected_months (list): List of selected months to filter the data.
-
-    Returns:
-        Figure: Plotly Figure object representing the stacked bar chart for power consumption by month.
+    Attributes:
+        totals (ndarray): The 12 x 3 matrix of the totals of each zone by month.
     """
-    # Columns to average and to find the maximum
-    columns_to_avg = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows']
-    columns_to_max = ['Zone1', 'Zone2', 'Zone3', 'PowerConsumption_AllZones']
-
-    # Group by specified columns and aggregate
-    DailyData_df = df.groupby(['date', 'week', 'DayName', 'MonthName', 'MonthNumber', 'DayOfMonth', 'DayOfYear']).agg(
-        {**{col: 'mean' for col in columns_to_avg}, **{col: 'max' for col in columns_to_max}}
-    ).reset_index()
 
-    return update_stacked_bar_chart_month(DailyData_df, selected_months)
+    def __init__(self, DailyData_df):
+        self.totals = get_month_zone_totals(DailyData_df)
+        self._figures = {}
+        self._lock = threading.Lock()
+
+    def get_figures(self, selected_months, on_progress=None):
+        """
+        Get the charts by zone and by month of a selection of months, built once per selection.
+
+        Parameters:
+            selected_months (list): List of selected months to filter the data.
+            on_progress (callable): Called with the number of charts built so far, after each chart
+                built for a new selection.
+
+        Returns:
+            tuple: The clustered bar chart by zone and the stacked bar chart by month.
+        """
+        # At most 4096 selections, so the cache needs no eviction
+        mask = get_month_mask(selected_months)
+        figures = self._figures.get(mask)
+        if figures is None:
+            zone_figure = serialize.compact_figure(update_stacked_bar_chart_zone(self.totals, mask))
+            if on_progress is not None:
+                on_progress(1)
+            figures = (zone_figure, serialize.compact_figure(update_stacked_bar_chart_month(self.totals, mask)))
+            if on_progress is not None:
+                on_progress(2)
+            with self._lock:
+                figures = self._figures.setdefault(mask, figures)
+        return figures
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: downsample.py
+    Purpose: Contains the downsampling of the traces drawn from large data.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to cap the number of points of a trace while preserving
+    its shape: Largest-Triangle-Three-Buckets (LTTB) or the minimum and maximum of equal-width x
+    buckets for time series, and one point per grid cell for scatter clouds. It also decides when
+    a trace is drawn with WebGL (Scattergl) instead of SVG.
+
+    Set POWER_MAX_POINTS, POWER_MAX_SCATTER_POINTS and POWER_WEBGL_THRESHOLD to change the default limits.
+'''
+
+import os
+
+import numpy as np
+
+# Maximum number of points per trace, about the width in pixels of a wide chart
+MAX_POINTS = int(os.environ.get('POWER_MAX_POINTS', '2000'))
+
+# Maximum number of points of a scatter cloud; WebGL draws clouds far larger than line traces
+MAX_SCATTER_POINTS = int(os.environ.get('POWER_MAX_SCATTER_POINTS', '20000'))
+
+# Number of points per trace above which the trace is drawn with WebGL
+WEBGL_THRESHOLD = int(os.environ.get('POWER_WEBGL_THRESHOLD', '1000'))
+
+# Downsampling methods of the time series
+METHODS = ('lttb', 'minmax')
+
+
+def _lttb_valid_indices(x, y, n_out):
+    """
+    Select points of a series without missing values with Largest-Triangle-Three-Buckets.
+
+    Parameters:
+        x (ndarray): The sorted x values, as floats.
+        y (ndarray): The y values, as floats.
+        n_out (int): The number of points to select, at least 3.
+
+    Returns:
+        ndarray: The positions of the selected points.
+    """
+    n = len(x)
+
+    # The first and last points are kept; the others are split into n_out - 2 buckets
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype('int64'), n)
+    selected = np.empty(n_out, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+
+        # Keep the point of the bucket forming the largest triangle with the previous selected
+        # point and the average of the next bucket
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(areas.argmax())
+        selected[i + 1] = previous
+
+    return selected
+
+
+# Function to downsample a series with LTTB
+def lttb_indices(x, y, n_out):
+    """
+    Select the points of a series that best preserve its visual shape, with the
+    Largest-Triangle-Three-Buckets algorithm.
+
+    Parameters:
+        x (array-like): The x values, sorted.
+        y (array-like): The y values.
+        n_out (int): The maximum number of points to keep.
+
+    Returns:
+        ndarray: The sorted positions of the kept points. Points with a missing y are dropped
+            when the series is downsampled.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    if n_out >= len(x) or n_out < 3:
+        return np.arange(len(x))
+
+    valid = np.flatnonzero(~np.isnan(y))
+    if n_out >= len(valid):
+        return valid
+    return valid[_lttb_valid_indices(x[valid], y[valid], n_out)]
+
+
+# Function to downsample a series with the extrema of x buckets
+def minmax_indices(x, y, n_out):
+    """
+    Select the points with the minimum and the maximum y of each of (n_out - 2) / 2 equal-width x
+    buckets, so that every peak of the series is kept.
+
+    Parameters:
+        x (array-like): The x values, sorted.
+        y (array-like): The y values.
+        n_out (int): The maximum number of points to keep.
+
+    Returns:
+        ndarray: The sorted positions of the kept points.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    if n_out >= len(x) or n_out < 4:
+        return np.arange(len(x))
+
+    valid = np.flatnonzero(~np.isnan(y))
+    if n_out >= len(valid):
+        return valid
+    x, y = x[valid], y[valid]
+
+    # Sort the points by bucket, then by value: the ends of each bucket are its extrema
+    buckets = max((n_out - 2) // 2, 1)
+    span = (x[-1] - x[0]) or 1
+    bucket = np.minimum(((x - x[0]) / span * buckets).astype('int64'), buckets - 1)
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.concatenate(([True], bucket[order][1:] != bucket[order][:-1])))
+    ends = np.append(starts[1:], len(order)) - 1
+
+    # The first and last points are kept so that the series spans the same range
+    return valid[np.unique(np.concatenate(([0, len(x) - 1], order[starts], order[ends])))]
+
+
+# Function to downsample a series with one of the methods
+def downsample_indices(x, y, n_out=MAX_POINTS, method='lttb'):
+    """
+    Select the points of a series to draw.
+
+    Parameters:
+        x (array-like): The x values, sorted.
+        y (array-like): The y values.
+        n_out (int): The maximum number of points to keep.
+        method (str): The downsampling method, one of METHODS.
+
+    Returns:
+        ndarray: The sorted positions of the kept points.
+    """
+    if method == 'lttb':
+        return lttb_indices(x, y, n_out)
+    if method == 'minmax':
+        return minmax_indices(x, y, n_out)
+    raise ValueError(f'Unknown downsampling method: {method}')
+
+
+# Function to thin a scatter cloud
+def grid_indices(x, y, n_out=MAX_POINTS):
+    """
+    Keep one point per cell of a square grid laid over a scatter cloud, so that its outline and
+    outliers are kept while dense regions are thinned.
+
+    Parameters:
+        x (array-like): The x values.
+        y (array-like): The y values.
+        n_out (int): The maximum number of points to keep, the number of cells of the grid.
+
+    Returns:
+        ndarray: The sorted positions of the kept points.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    if n_out >= len(x):
+        return np.arange(len(x))
+
+    valid = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    side = max(int(np.sqrt(n_out)), 1)
+    cells = np.zeros(len(valid), dtype='int64')
+    for values in (x[valid], y[valid]):
+        span = np.ptp(values) if len(values) else 0
+        cell = ((values - values.min()) / span * (side - 1)).round().astype('int64') if span else 0
+        cells = cells * side + cell
+
+    _, first = np.unique(cells, return_index=True)
+    return valid[np.sort(first)]
+
+
+# Function to pick the rendering mode of a trace
+def get_render_mode(n_points, threshold=WEBGL_THRESHOLD):
+    """
+    Pick the rendering mode of a trace from its number of points.
+
+    Parameters:
+        n_points (int): The number of points of the trace.
+        threshold (int): The number of points above which WebGL is used.
+
+    Returns:
+        str: 'webgl' above the threshold, 'svg' otherwise, as the render_mode of plotly express.
+    """
+    return 'webgl' if n_points > threshold else 'svg'
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: figures.py
+    Purpose: Contains the construction of the figure dictionaries of the charts.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to build the traces and layouts of the charts as plain
+    dictionaries from NumPy arrays, without the DataFrame introspection, reshaping and validation
+    of plotly express and plotly.graph_objects. The figures look the same: they embed the default
+    template of plotly and take their colors from it.
+'''
+
+import numpy as np
+import plotly.io as pio
+
+# Default template of plotly, converted to a dictionary once
+_template = {}
+
+
+def get_template():
+    """
+    Get the default template of plotly, which plotly express embeds in every figure.
+
+    Returns:
+        dict: The template, shared by the figures and not to be modified.
+    """
+    if not _template:
+        _template.update(pio.templates[pio.templates.default].to_plotly_json())
+    return _template
+
+
+def get_colorway():
+    """
+    Get the colors given in turn to the traces by the default template.
+
+    Returns:
+        list: The colors.
+    """
+    return get_template()['layout']['colorway']
+
+
+def get_sequential_colorscale():
+    """
+    Get the colorscale of the continuous colors of the default template.
+
+    Returns:
+        list: The colorscale, as [position, color] pairs.
+    """
+    return get_template()['layout']['colorscale']['sequential']
+
+
+# Function to convert timestamps to the shortest date strings that keep them
+def to_date_strings(values):
+    """
+    Convert timestamps to ISO date strings, without the time when every timestamp is a midnight.
+
+    Parameters:
+        values (array-like): The timestamps.
+
+    Returns:
+        ndarray: The date strings.
+    """
+    values = np.asarray(values, dtype='datetime64[s]')
+    seconds = values.astype('int64')
+    if (seconds % 86400 == 0).all():
+        return np.datetime_as_string(values, unit='D')
+    if (seconds % 60 == 0).all():
+        return np.datetime_as_string(values, unit='m')
+    return np.datetime_as_string(values, unit='s')
+
+
+def scatter(x, y, name='', mode='markers', render_mode='svg', **attributes):
+    """
+    Build a scatter trace.
+
+    Parameters:
+        x (array-like): The x values.
+        y (array-like): The y values.
+        name (str): The name of the trace in the legend and hover labels.
+        mode (str): The drawing mode, such as 'markers' or 'lines'.
+        render_mode (str): 'webgl' to draw the trace with WebGL, 'svg' otherwise.
+        attributes: The other attributes of the trace.
+
+    Returns:
+        dict: The trace.
+    """
+    trace_type = 'scattergl' if render_mode == 'webgl' else 'scatter'
+    return {'type': trace_type, 'x': x, 'y': y, 'name': name, 'mode': mode, **attributes}
+
+
+def bar(x, y, name='', **attributes):
+    """
+    Build a vertical bar trace.
+
+    Parameters:
+        x (array-like): The categories.
+        y (array-like): The heights of the bars.
+        name (str): The name of the trace in the legend and hover labels.
+        attributes: The other attributes of the trace.
+
+    Returns:
+        dict: The trace.
+    """
+    return {'type': 'bar', 'x': x, 'y': y, 'name': name, **attributes}
+
+
+def axis(title=None, **attributes):
+    """
+    Build the attributes of an axis.
+
+    Parameters:
+        title (str): The title of the axis, None for no title.
+        attributes: The other attributes of the axis.
+
+    Returns:
+        dict: The axis.
+    """
+    return {'title': {'text': title} if title is not None else {}, **attributes}
+
+
+def figure(data, title, xaxis, yaxis, **attributes):
+    """
+    Build a figure with the default template.
+
+    Parameters:
+        data (list): The traces.
+        title (str): The title of the figure.
+        xaxis (dict): The x-axis, see axis.
+        yaxis (dict): The y-axis, see axis.
+        attributes: The other attributes of the layout.
+
+    Returns:
+        dict: The figure, accepted as is by dcc.Graph.
+    """
+    layout = {'template': get_template(), 'title': {'text': title}, 'xaxis': xaxis, 'yaxis': yaxis, **attributes}
+    return {'data': data, 'layout': layout}
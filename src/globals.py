@@ -11,16 +11,396 @@
     Python Version: 3.8
 
     This file provides functionality to load and preprocess data for visualizing power consumption.
+    Nothing is loaded on import: the raw, hourly and daily DataFrames are computed on first use
+    (from the on-disk cache when warm) and kept for later calls. The server calls warm_up to load
+    them before serving requests.
+
+    New readings can be appended with append_rows, and reload_data rebuilds everything from a new
+    data file. Callbacks should read the data through get_dataset so that they see a consistent set
+    of DataFrames and figures while an append or a reload is in progress. An append only updates
+    the data of the process that calls it: under gunicorn, the other workers and the master do not
+    see it, and a reload of the data file drops it.
+
+    When POWER_SHARED_MANIFEST is set, the DataFrames are attached from the shared memory published
+    by a loader process (see shared.py) instead of being read from the data file.
 '''
 
+import os
+import threading
+
+import pandas as pd
+
+import aggregate
+import cache
 import preprocess
+import shared
 
 # Define the file path for the data
 file_path = './assets/data/powerconsumption.csv'
 
-# Load and preprocess the data
-df = preprocess.data_preprocess(file_path)
+# Store the DataFrames in compact form (float32 measures, categorical labels); set POWER_COMPACT=0 to disable
+compact = os.environ.get('POWER_COMPACT', '1') != '0'
+
+# Manifest of the DataFrames published in shared memory by a loader process, if any
+shared_manifest = os.environ.get('POWER_SHARED_MANIFEST')
+
+# Builders of the figures computed once per set of DataFrames, registered by the app
+figure_builders = {}
+
+
+class Dataset:
+    """
+    Consistent set of DataFrames, each one computed on first use and then kept.
+
+    Attributes:
+        df (DataFrame): The preprocessed data.
+        df_hourly (DataFrame): The hourly aggregated data.
+        df_daily (DataFrame): The daily aggregated data.
+        version (int): The number of appends and reloads applied since the server started.
+    """
+
+    def __init__(self, file_path, compact=False, version=0, frames=None, states=None, cache_key=None,
+                 chunks=None, last_datetime=None):
+        self.file_path = file_path
+        self.compact = compact
+        self.version = version
+        self._frames = dict(frames or {})
+        self._chunks = dict(chunks or {})
+        self._states = states
+        self._last_datetime = last_datetime
+        self._figures = {}
+        self._cache_key = cache_key
+        self._lock = threading.RLock()
+
+    def get_cache_key(self):
+        """
+        Get the cache key of the data file, hashing it on the first call.
+
+        Returns:
+            str: The cache key.
+        """
+        if self._cache_key is None:
+            self._cache_key = cache.get_cache_key(self.file_path, self.compact)
+        return self._cache_key
+
+    def _build_df(self):
+        """
+        Preprocess the data file.
+
+        Returns:
+            DataFrame: The preprocessed data.
+        """
+        df = preprocess.data_preprocess(self.file_path)
+        return preprocess.compact_frame(df) if self.compact else df
+
+    def _get_frame(self, name):
+        """
+        Get a DataFrame of the set, computing it on first use.
+
+        Parameters:
+            name (str): The name of the frame, one of cache.FRAME_NAMES.
+
+        Returns:
+            DataFrame: The requested frame.
+        """
+        frame = self._frames.get(name)
+        if frame is not None:
+            return frame
+
+        with self._lock:
+            if name in self._chunks:
+                # Appended frames are concatenated once, on first use
+                chunks = self._chunks.pop(name)
+                self._frames[name] = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+            if name not in self._frames:
+                builders = {
+                    'df': self._build_df,
+                    'df_hourly': lambda: preprocess.get_HourlyData(self.df),
+                    'df_daily': lambda: preprocess.get_DailyData(self.df)
+                }
+                self._frames[name] = cache.load_or_build(self.get_cache_key(), name, builders[name])
+            return self._frames[name]
+
+    def _get_chunks(self, name):
+        """
+        Get a DataFrame of the set as a list of consecutive chunks, without concatenating them.
+
+        Parameters:
+            name (str): The name of the frame, one of cache.FRAME_NAMES.
+
+        Returns:
+            list: The chunks of the frame, in order.
+        """
+        with self._lock:
+            chunks = self._chunks.get(name)
+        return list(chunks) if chunks is not None else [self._get_frame(name)]
+
+    def get_last_datetime(self):
+        """
+        Get the time of the last reading of the set, scanning the data on the first call only.
+
+        Returns:
+            Timestamp: The time of the last reading, None if there is none.
+        """
+        if self._last_datetime is None and len(self.df):
+            self._last_datetime = self.df['datetime'].max()
+        return self._last_datetime
+
+    def get_dtypes(self):
+        """
+        Get the column types of the preprocessed data, without concatenating appended chunks.
+
+        Returns:
+            Series: The dtype of each column.
+        """
+        return self._get_chunks('df')[0].dtypes
+
+    @property
+    def df(self):
+        return self._get_frame('df')
+
+    @property
+    def df_hourly(self):
+        return self._get_frame('df_hourly')
+
+    @property
+    def df_daily(self):
+        return self._get_frame('df_daily')
+
+    def get_figure(self, name):
+        """
+        Get a figure built from the DataFrames of the set, building it on first use.
+
+        Parameters:
+            name (str): The name under which the figure builder was registered.
+
+        Returns:
+            Figure: The requested figure.
+        """
+        figure = self._figures.get(name)
+        if figure is not None:
+            return figure
+
+        with self._lock:
+            if name not in self._figures:
+                self._figures[name] = figure_builders[name](self)
+            return self._figures[name]
+
+    def warm_up(self, figures=True):
+        """
+        Compute all the DataFrames of the set, and the registered figures.
+
+        Parameters:
+            figures (bool): Whether to also build the registered figures.
+        """
+        for name in cache.FRAME_NAMES:
+            self._get_frame(name)
+        if figures:
+            for name in list(figure_builders):
+                self.get_figure(name)
+
+    def append(self, new_df):
+        """
+        Build the set of DataFrames resulting from appending new preprocessed samples.
+
+        Only the hourly and daily buckets touched by the new samples are recomputed, and the frames
+        are kept as chunks until they are used, so the cost is proportional to the new samples.
+        The running reductions move to the new set: appending to this set again recomputes them.
+
+        Parameters:
+            new_df (DataFrame): The new preprocessed samples, after the last reading of the set.
+
+        Returns:
+            Dataset: The updated set of DataFrames.
+        """
+        with self._lock:
+            if self._states is None:
+                states = aggregate.compute_states(self.df, ['hour', 'day'])
+                self._states = {resolution: aggregate.BucketBuffer(state) for resolution, state in states.items()}
+            buffers, self._states = self._states, None
+
+        chunks = aggregate.update_aggregates(
+            {'hour': self._get_chunks('df_hourly'), 'day': self._get_chunks('df_daily')}, buffers, new_df)
+
+        last_datetime = new_df['datetime'].max()
+        if self.get_last_datetime() is not None:
+            last_datetime = max(last_datetime, self.get_last_datetime())
+
+        return Dataset(
+            self.file_path, self.compact, self.version + 1,
+            chunks={
+                'df': self._get_chunks('df') + [new_df],
+                'df_hourly': chunks['hour'],
+                'df_daily': chunks['day']
+            },
+            states=buffers,
+            cache_key=self._cache_key,
+            last_datetime=last_datetime
+        )
+
+
+# Function to create the set of DataFrames of the data source
+def _new_dataset(version=0):
+    """
+    Create the set of DataFrames of the data source: the frames published in shared memory when a
+    manifest is configured and exists, otherwise the data file.
+
+    Parameters:
+        version (int): The version of the new set.
+
+    Returns:
+        Dataset: The new set of DataFrames.
+    """
+    if shared_manifest and os.path.exists(shared_manifest):
+        cache_key, frames = shared.attach(shared_manifest)
+        return Dataset(file_path, compact, version, frames=frames, cache_key=cache_key)
+    return Dataset(file_path, compact, version)
+
+
+# Current set of DataFrames, swapped as a whole on appends and reloads
+dataset = _new_dataset()
+
+# Serializes the swaps of the current set; readers never take it
+_append_lock = threading.Lock()
+
+
+# Function to get the current DataFrames
+def get_dataset():
+    """
+    Get the current set of DataFrames.
+
+    Returns:
+        Dataset: The current set of DataFrames.
+    """
+    return dataset
+
+
+# Function to load all the DataFrames ahead of the first request
+def warm_up(figures=True):
+    """
+    Load the raw, hourly and daily DataFrames of the current set, and build its registered figures.
+
+    Parameters:
+        figures (bool): Whether to also build the registered figures.
+
+    Returns:
+        Dataset: The current set of DataFrames.
+    """
+    current = dataset
+    current.warm_up(figures)
+    return current
+
+
+# Function to get the file to watch for new data
+def get_source_path():
+    """
+    Get the path of the file to watch for new data: the shared memory manifest or the data file.
+
+    Returns:
+        str: The path of the file.
+    """
+    return shared_manifest or file_path
+
+
+# Function to get the cache key of the data source
+def get_source_key():
+    """
+    Get the cache key of the data currently available from the data source.
+
+    Returns:
+        str: The cache key, or None if the data source does not exist.
+    """
+    if not os.path.exists(get_source_path()):
+        return None
+    if shared_manifest:
+        return shared.read_manifest(shared_manifest)['cache_key']
+    return cache.get_cache_key(file_path, compact)
+
+
+# Function to register a figure built once per set of DataFrames
+def register_figure(name, builder):
+    """
+    Register a figure built from the DataFrames, such as the figures of the initial layout.
+
+    Parameters:
+        name (str): The name of the figure.
+        builder (callable): Builds the figure from a Dataset.
+    """
+    figure_builders[name] = builder
+
+
+# Function to rebuild the DataFrames and figures from the data file
+def reload_data(figures=True):
+    """
+    Rebuild the DataFrames and the registered figures from the data source and swap them in.
+
+    The new set is fully built before the swap, so callbacks keep serving the previous set until
+    then. Readings appended with append_rows but missing from the data source are dropped.
+
+    Parameters:
+        figures (bool): Whether to also build the registered figures before the swap.
+
+    Returns:
+        Dataset: The new set of DataFrames.
+    """
+    global dataset  # pylint: disable=global-statement
+
+    new_dataset = _new_dataset(dataset.version + 1)
+    new_dataset.warm_up(figures)
+
+    with _append_lock:
+        new_dataset.version = dataset.version + 1
+        dataset = new_dataset
+
+    return dataset
+
+
+# Function to append new readings to the data
+def append_rows(raw_rows):
+    """
+    Append new raw readings and update the hourly and daily aggregates in place of a full reload.
+
+    Only the hourly and daily buckets touched by the new readings are recomputed. The new
+    DataFrames are published atomically: callbacks that already hold the previous Dataset keep
+    using it, later calls to get_dataset return the new one.
+
+    Readings at or before the last ingested one are silently dropped, so that a batch sent again is
+    never counted twice in the aggregates, and only the last reading of a repeated timestamp within
+    the batch is kept. Late or out-of-order readings are therefore lost until the data file is
+    reloaded with them. The append is only seen by the process calling it, see the module docstring.
+
+    Parameters:
+        raw_rows (DataFrame): The new readings, with the columns of the CSV file.
+
+    Returns:
+        Dataset: The updated set of DataFrames, or the current one if no reading is new.
+    """
+    global dataset  # pylint: disable=global-statement
+
+    with _append_lock:
+        current = dataset
+
+        # Preprocess the new readings with the same column types as the existing data
+        raw_rows = raw_rows[[preprocess.DATETIME_COLUMN, *preprocess.CSV_DTYPES]].astype(preprocess.CSV_DTYPES)
+        raw_rows = preprocess.parse_datetime(raw_rows)
+
+        # Keep the readings after the last ingested one, once per timestamp, in time order
+        last_datetime = current.get_last_datetime()
+        if last_datetime is not None:
+            raw_rows = raw_rows[raw_rows['datetime'] > last_datetime]
+        raw_rows = raw_rows.drop_duplicates('datetime', keep='last').sort_values('datetime', kind='stable')
+        if raw_rows.empty:
+            return current
+
+        new_df = preprocess.preprocess_raw_data(raw_rows).astype(current.get_dtypes().to_dict())
+
+        dataset = current.append(new_df)
+
+    return dataset
+
 
-# Generate hourly and daily data DataFrames
-df_hourly = preprocess.get_HourlyData(df)
-df_daily = preprocess.get_DailyData(df)
+# Lazy access to the DataFrames of the current set as module attributes (globals.df, ...)
+def __getattr__(name):
+    if name in cache.FRAME_NAMES:
+        return getattr(get_dataset(), name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
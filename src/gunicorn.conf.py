@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: gunicorn.conf.py
+    Purpose: Contains the configuration of the production server.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file configures gunicorn to serve the Dash application with several worker processes of
+    several threads each: `gunicorn -c gunicorn.conf.py server:application` from the src directory.
+
+    By default the app is preloaded: the data and the figures of the initial layout are loaded once
+    by the master process before it forks the workers, which share them copy-on-write. The master
+    polls the data file and, on a change, rebuilds the data in a background thread, so that it keeps
+    supervising the workers meanwhile; once the data is rebuilt it sends itself SIGHUP, starts new
+    workers with it and stops the old ones once their requests are served. The /admin/reload
+    endpoint of the workers starts the same rebuild through RELOAD_SIGNAL, so the workers are
+    replaced once. `kill -HUP <master pid>` also starts it, after a first restart of the workers on
+    the current data, as gunicorn replaces them on every SIGHUP.
+
+    Set POWER_BIND, POWER_WORKERS, POWER_THREADS, POWER_TIMEOUT and POWER_GRACEFUL_TIMEOUT to change
+    the defaults, and POWER_PRELOAD=0 to load the data in each worker instead.
+'''
+
+import os
+import signal
+import threading
+
+# Run from the directory of the app, where the data paths are relative to
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.environ.get('POWER_BIND', '0.0.0.0:8050')
+
+# Worker processes, each serving requests with a pool of threads
+workers = int(os.environ.get('POWER_WORKERS', str(min(4, os.cpu_count() or 1))))
+threads = int(os.environ.get('POWER_THREADS', '4'))
+worker_class = 'gthread'
+
+# Load the data and build the figures in the master process, before fork
+preload_app = os.environ.get('POWER_PRELOAD', '1') != '0'
+
+# Seconds before a silent worker is restarted, and given to a worker to finish its requests on reload
+timeout = int(os.environ.get('POWER_TIMEOUT', '120'))
+graceful_timeout = int(os.environ.get('POWER_GRACEFUL_TIMEOUT', '30'))
+
+# Signal of the workers requesting a rebuild of the data from the master, one that gunicorn does not
+# handle and that is ignored by default
+RELOAD_SIGNAL = signal.SIGURG
+
+
+def _get_reload_state(server):
+    """
+    Get the state of the reloads of the master process, kept on the arbiter since gunicorn executes
+    this file again on every SIGHUP.
+
+    Parameters:
+        server (Arbiter): The gunicorn master process.
+
+    Returns:
+        dict: The version of the data the current workers were started with, whether a finished
+            rebuild sent the pending SIGHUP, the requests of the workers and the lock of the state.
+    """
+    if not hasattr(server, 'power_reload_state'):
+        server.power_reload_state = {'version': None, 'signalled': False, 'requested': threading.Event(),
+                                     'lock': threading.Lock()}
+    return server.power_reload_state
+
+
+def _rebuild_data(server):
+    """
+    Rebuild the data in a background thread of the master process, then reload the workers with it.
+
+    Parameters:
+        server (Arbiter): The gunicorn master process.
+
+    Returns:
+        bool: True if a rebuild was started, False if one is already in progress.
+    """
+    import reloader  # pylint: disable=import-outside-toplevel
+
+    state = _get_reload_state(server)
+
+    def on_done(data):
+        server.log.info('Rebuilt the data, version %s', data.version)
+        with state['lock']:
+            state['signalled'] = True
+        os.kill(server.pid, signal.SIGHUP)
+
+    started = reloader.request_reload(on_done=on_done)
+    if started:
+        server.log.info('Rebuilding the data in the background')
+    return started
+
+
+def _serve_reload_requests(server):
+    """
+    Rebuild the data on the requests of the workers, in a background thread of the master process.
+
+    Parameters:
+        server (Arbiter): The gunicorn master process.
+    """
+    requested = _get_reload_state(server)['requested']
+    while True:
+        requested.wait()
+        requested.clear()
+        _rebuild_data(server)
+
+
+def when_ready(server):
+    """
+    Poll the data file from the master process, and reload the workers gracefully when it changes
+    or when a worker requests it.
+
+    Parameters:
+        server (Arbiter): The gunicorn master process.
+    """
+    import reloader  # pylint: disable=import-outside-toplevel
+
+    if server.cfg.preload_app:
+        import globals  # pylint: disable=import-outside-toplevel,redefined-builtin
+
+        state = _get_reload_state(server)
+        state['version'] = globals.get_dataset().version
+        reloader.start_watcher(on_change=lambda: _rebuild_data(server))
+
+        # The handler only wakes the thread, it must not take the locks the interrupted thread holds
+        signal.signal(RELOAD_SIGNAL, lambda signum, frame: state['requested'].set())
+        threading.Thread(target=_serve_reload_requests, args=(server,), name='reload-requests', daemon=True).start()
+    else:
+        # The new workers load the data themselves
+        master_pid = os.getpid()
+        reloader.start_watcher(on_change=lambda: os.kill(master_pid, signal.SIGHUP))
+    server.log.info('Watching the data file for changes')
+
+
+def on_reload(server):
+    """
+    Start the new workers with the data rebuilt in the background, when preloaded, or start the
+    rebuild if the reload was not requested by it.
+
+    The rebuild never runs on the thread of the master process that supervises the workers.
+
+    Parameters:
+        server (Arbiter): The gunicorn master process.
+    """
+    if not server.cfg.preload_app:
+        return  # The new workers load the data themselves
+
+    import globals  # pylint: disable=import-outside-toplevel,redefined-builtin
+    import reloader  # pylint: disable=import-outside-toplevel
+
+    state, version = _get_reload_state(server), globals.get_dataset().version
+    with state['lock']:
+        rebuilt, signalled = version != state['version'], state['signalled']
+        state.update(version=version, signalled=False)
+
+    if rebuilt:
+        server.log.info('Reloaded the data, version %s', version)
+    elif not signalled and not reloader.is_reloading():
+        # Requested by SIGHUP: the new workers keep the current data meanwhile
+        _rebuild_data(server)
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """
+    Forward the reload requests of a worker to the master process: a request to rebuild the data
+    when preloaded, a SIGHUP replacing the workers otherwise.
+
+    Parameters:
+        server (Arbiter): The gunicorn master process.
+        worker (Worker): The new worker.
+    """
+    import reloader  # pylint: disable=import-outside-toplevel
+
+    master_pid = server.pid
+    reload_signal = RELOAD_SIGNAL if server.cfg.preload_app else signal.SIGHUP
+    reloader.set_reload_handler(lambda: os.kill(master_pid, reload_signal))
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: health.py
+    Purpose: Contains the warm-up of the server and its health and readiness endpoints.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to load the data and build the figures of the initial
+    layout ahead of the first request, in the calling thread or in a background thread, and to
+    report its progress: /healthz answers as soon as the process serves requests, /readyz only
+    once the warm-up is finished, so that a load balancer sends no traffic to a cold worker.
+'''
+
+import os
+import threading
+import time
+
+from flask import jsonify
+
+import globals  # pylint: disable=redefined-builtin
+import reloader
+
+# Set once the data and the figures of the initial layout are loaded
+_ready = threading.Event()
+
+# State of the warm-up, reported by the readiness endpoint
+_warm_up_state = {'started': None, 'seconds': None, 'error': None}
+
+
+def _run_warm_up(on_ready):
+    """
+    Load the data and build the registered figures, then mark the process as ready.
+
+    Parameters:
+        on_ready (callable): Called with the Dataset once it is loaded, None to skip.
+    """
+    _warm_up_state['started'] = time.perf_counter()
+    try:
+        data = globals.warm_up()
+        if on_ready is not None:
+            on_ready(data)
+    except Exception as error:  # pylint: disable=broad-except
+        _warm_up_state['error'] = repr(error)
+        raise
+    _warm_up_state['seconds'] = time.perf_counter() - _warm_up_state['started']
+    _ready.set()
+
+
+# Function to load the data ahead of the first request
+def warm_up(background=False, on_ready=None):
+    """
+    Load the data and build the figures of the initial layout.
+
+    Parameters:
+        background (bool): Whether to load them in a background thread, so that the process can
+            answer the health checks meanwhile.
+        on_ready (callable): Called with the Dataset once it is loaded, None to skip.
+
+    Returns:
+        Thread: The warm-up thread, or None if the warm-up is done when this function returns.
+    """
+    if not background:
+        _run_warm_up(on_ready)
+        return None
+    thread = threading.Thread(target=_run_warm_up, args=(on_ready,), name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready():
+    """
+    Check whether the warm-up is finished.
+
+    Returns:
+        bool: True if the data and the figures of the initial layout are loaded.
+    """
+    return _ready.is_set()
+
+
+def register_health_endpoints(server):
+    """
+    Add the /healthz and /readyz endpoints to the Flask server.
+
+    Parameters:
+        server (Flask): The Flask server of the Dash app.
+    """
+    @server.route('/healthz')
+    def healthz():  # pylint: disable=unused-variable
+        return jsonify(status='ok', pid=os.getpid())
+
+    @server.route('/readyz')
+    def readyz():  # pylint: disable=unused-variable
+        if _warm_up_state['error'] is not None:
+            return jsonify(status='failed', error=_warm_up_state['error'], pid=os.getpid()), 503
+        if not is_ready():
+            return jsonify(status='warming up', pid=os.getpid()), 503
+
+        return jsonify(status='ready', pid=os.getpid(), version=globals.get_dataset().version,
+                       warm_up_seconds=round(_warm_up_state['seconds'], 3), reloading=reloader.is_reloading())
@@ -20,16 +20,19 @@ data_dict = {
     'WindSpeed': 'm/s'
 }
 
-def get_line_chart_hover_template():
+def get_line_chart_hover_template(zone):
     '''
         Sets the template for the hover tooltips in line charts.
-        
+
+        Parameters:
+            zone (str): The name of the zone of the line.
+
         Returns:
             str: The content of the tooltip.
     '''
     hover_template = (
         "<b>Date</b>: %{x}<br>"
-        "<b>Zone</b>: %{customdata[0]}<br>"
+        f"<b>Zone</b>: {zone}<br>"
         "<b>Power Consumption</b>: %{y:.2f} W<br>"
         "<extra></extra>"
     )
@@ -43,10 +46,9 @@ def get_heatmap_hover_template():
             str: The content of the tooltip.
     '''
     hover_template = (
-        "<span style='font-weight:bold'>Date</span>: %{customdata[0]}<br>"
-        "<span style='font-weight:bold'>Week of the Year</span>: %{x}<br>"
+        "<span style='font-weight:bold'>Date</span>: %{customdata}<br>"
         "<span style='font-weight:bold'>Day of the Week</span>: %{y}<br>"
-        "<span style='font-weight:bold'>Power Consumption</span>: %{z} W<br>"
+        "<span style='font-weight:bold'>Power Consumption</span>: %{z:.2f} W<br>"
         "<extra></extra>"
     )
     return hover_template
@@ -65,6 +67,55 @@ def get_barchart_hover_template():
     )
     return hover_template
 
+def get_bubble_plot_hover_template():
+    '''
+        Sets the template for the hover tooltips in bubble plots, whose customdata holds the date,
+        humidity, temperature, wind speed and power consumption of each day.
+
+        Returns:
+            str: The content of the tooltip.
+    '''
+    hover_template = (
+        '<b>Date:</b> %{customdata[0]}<br>'
+        '<b>Humidity:</b> %{customdata[1]:.2f}RH<br>'
+        '<b>Temperature:</b> %{customdata[2]:.2f}ºC<br>'
+        '<b>WindSpeed:</b> %{customdata[3]:.2f}m/s<br>'
+        '<b>Power Consumption:</b> %{customdata[4]:.2f}W<br>'
+        '<b>Month:</b> %{customdata[0]|%B}<br>'  # The month name is formatted from the date
+        '<extra></extra>'  # This removes the secondary box with extra data
+    )
+    return hover_template
+
+def get_zone_bar_hover_template():
+    '''
+        Sets the template for the hover tooltips in the bar chart of the power consumption by zone.
+
+        Returns:
+            str: The content of the tooltip.
+    '''
+    hover_template = (
+        '<b>Zone:</b> %{x}<br>'
+        '<b>Power Consumption:</b> %{y:.2f}W<br>'
+        '<extra></extra>'
+    )
+    return hover_template
+
+def get_month_bar_hover_template():
+    '''
+        Sets the template for the hover tooltips in the stacked bar chart of the power consumption
+        by month, whose text holds the percentage of each zone.
+
+        Returns:
+            str: The content of the tooltip.
+    '''
+    hover_template = (
+        '<b>Month:</b> %{x}<br>'
+        '<b>Power Consumption:</b> %{y:.2f}W<br>'
+        '<b>Percentage:</b> %{text:.2f}%<br>'
+        '<extra></extra>'
+    )
+    return hover_template
+
 def get_scatterplotchart_hover_template(x_col, y_col):
     '''
         Sets the template for the hover tooltips in scatter plots.
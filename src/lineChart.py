@@ -13,66 +13,148 @@
     This file provides the functionality to generate line charts for daily power consumption data across different zones.
 '''
 
-import plotly.express as px
+import numpy as np
+import pandas as pd
+import aggregate
+import downsample
+import figures
 import hover_template as hover
+import preprocess
 
+# Zone columns drawn as lines
+ZONE_COLUMNS = ['PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3',
+                'PowerConsumption_AllZones']
 
-def get_line_data(DailyData_df):
+# Names of the zones in the legend and hover labels, and their line styles
+ZONE_NAMES = {
+    'PowerConsumption_Zone1': 'Zone1',
+    'PowerConsumption_Zone2': 'Zone2',
+    'PowerConsumption_Zone3': 'Zone3',
+    'PowerConsumption_AllZones': 'AllZones'
+}
+LINE_DASHES = ['solid', 'dot', 'dash', 'longdash']
+
+# Resolutions of the zoomable line chart, from the finest to the coarsest, with their labels
+TIERS = {'10min': '10-minute', 'hour': 'hourly', 'day': 'daily', 'week': 'weekly'}
+
+
+def get_line_data(DailyData_df, max_points=downsample.MAX_POINTS, method='lttb'):
     """
     Generate a line chart for power consumption over time.
 
+    Each zone is downsampled to at most max_points points by a shape-preserving downsampler, and
+    drawn with WebGL above downsample.WEBGL_THRESHOLD points.
+
     Parameters:
-        DailyData_df (DataFrame): The daily data DataFrame containing power consumption data.
+        DailyData_df (DataFrame): The daily data DataFrame containing power consumption data, or
+            data at another resolution with its timestamps in a 'date' column, sorted by time.
+        max_points (int): The maximum number of points per zone.
+        method (str): The downsampling method, one of downsample.METHODS.
 
     Returns:
-        Figure: Plotly Figure object representing the line chart for power consumption over time.
+        dict: The figure of the line chart for power consumption over time.
     """
-    # Transform the DataFrame to long-form for Plotly Express
-    DailyData_LineChart_df = DailyData_df.melt(
-        id_vars=['date'],
-        value_vars=['PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3',
-                   'PowerConsumption_AllZones'],
-        var_name='Zone',
-        value_name='PowerConsumption'
-    )
-
-    # Map the var_name to the desired Zone names for hover
-    zone_names = {
-        'PowerConsumption_Zone1': 'Zone1',
-        'PowerConsumption_Zone2': 'Zone2',
-        'PowerConsumption_Zone3': 'Zone3',
-        'PowerConsumption_AllZones': 'AllZones'
-    }
-    DailyData_LineChart_df['Zone'] = DailyData_LineChart_df['Zone'].map(zone_names)
-
-    # Create the line chart with different line styles based on 'Zone'
-    fig = px.line(
-        DailyData_LineChart_df,
-        x='date',
-        y='PowerConsumption',
-        color='Zone',
-        title='Power Consumption Over Time',
-        labels={
-            'date': 'Date',
-            'PowerConsumption': 'Power Consumption (kW)'
-        },
-        line_group='Zone',
-        hover_name='Zone',
-        hover_data={'PowerConsumption': False, 'Zone': True},  # Include 'Zone' in hover info
-        line_dash='Zone'  # Use 'Zone' to differentiate line styles based on categorical variable
-    )
-
-    # Update hover template
-    fig.update(data=[{'hovertemplate': hover.get_line_chart_hover_template()}])
+    if 'date' not in DailyData_df:
+        DailyData_df = preprocess.attach_calendar(DailyData_df, ['date'])
+    time_axis = pd.to_datetime(DailyData_df['date']).to_numpy()
+    dates = figures.to_date_strings(time_axis)
+
+    # Downsample each zone separately, along its time axis
+    zone_indices = [
+        downsample.downsample_indices(time_axis.astype('int64'), DailyData_df[zone_col].to_numpy(), max_points, method)
+        for zone_col in ZONE_COLUMNS
+    ]
+    render_mode = downsample.get_render_mode(max((len(indices) for indices in zone_indices), default=0))
+
+    # Draw one line per zone, with its own color and line style
+    traces = []
+    for i, (zone_col, indices) in enumerate(zip(ZONE_COLUMNS, zone_indices)):
+        traces.append(figures.scatter(
+            dates[indices],
+            DailyData_df[zone_col].to_numpy()[indices],
+            name=ZONE_NAMES[zone_col],
+            mode='lines',
+            render_mode=render_mode,
+            line=dict(color=figures.get_colorway()[i], dash=LINE_DASHES[i]),
+            showlegend=True,
+            hovertemplate=hover.get_line_chart_hover_template(ZONE_NAMES[zone_col])
+        ))
 
     # Set layout options to prevent zooming
-    fig.update_layout(
-        yaxis = dict(fixedrange = True),  # Disables zoom on y-axis
-        xaxis = dict(fixedrange = True),  # Disables zoom on x-axis
+    return figures.figure(
+        traces,
+        title='Power Consumption Over Time',
+        xaxis=figures.axis('Date', fixedrange=True),  # Disables zoom on x-axis
+        yaxis=figures.axis('Power Consumption (kW)', fixedrange=True),  # Disables zoom on y-axis
+        legend=dict(title=dict(text='Zone'))
     )
 
-    return fig
-
 
+class LineTiers:
+    """
+    Maxima of each zone pre-aggregated at every resolution of TIERS, to draw any time window of
+    the line chart at the finest resolution that fits in a bounded number of points.
 
+    Attributes:
+        frames (dict): The 'date' and zone columns of each resolution, sorted by date.
+    """
 
+    def __init__(self, df, HourlyData_df, DailyData_df):
+        frames = aggregate.aggregate(df, ['10min', 'week'])
+        self.frames = {
+            '10min': frames['10min'].rename(columns={'datetime': 'date'})[['date', *ZONE_COLUMNS]],
+            'hour': HourlyData_df.rename(columns={'datetime1': 'date'})[['date', *ZONE_COLUMNS]],
+            'day': DailyData_df[ZONE_COLUMNS].assign(date=pd.to_datetime(DailyData_df['day_key'].to_numpy(), unit='D')),
+            'week': frames['week'].rename(columns={'datetime': 'date'})[['date', *ZONE_COLUMNS]]
+        }
+        self._times = {tier: frame['date'].to_numpy().astype('datetime64[ns]').astype('int64')
+                       for tier, frame in self.frames.items()}
+
+    def get_window(self, start=None, end=None, max_points=downsample.MAX_POINTS):
+        """
+        Get the rows of a time window at the finest resolution with at most max_points rows in it.
+
+        Parameters:
+            start (Timestamp): The start of the window, None for the start of the data.
+            end (Timestamp): The end of the window, None for the end of the data.
+            max_points (int): The maximum number of rows per zone.
+
+        Returns:
+            tuple: The resolution and the rows of the window, with one more row on each side so
+                that the lines reach the edges of the window.
+        """
+        for tier, frame in self.frames.items():
+            times = self._times[tier]
+            first = np.searchsorted(times, pd.Timestamp(start).value, 'left') if start is not None else 0
+            last = np.searchsorted(times, pd.Timestamp(end).value, 'right') if end is not None else len(times)
+            if last - first <= max_points or tier == 'week':
+                return tier, frame.iloc[max(first - 1, 0):last + 1]
+        return None
+
+    def get_figure(self, start=None, end=None, max_points=downsample.MAX_POINTS):
+        """
+        Generate the zoomable line chart of a time window.
+
+        Parameters:
+            start (Timestamp): The start of the window, None for the start of the data.
+            end (Timestamp): The end of the window, None for the end of the data.
+            max_points (int): The maximum number of points per zone.
+
+        Returns:
+            dict: The figure of the line chart of the window.
+        """
+        tier, frame = self.get_window(start, end, max_points)
+
+        # The coarsest resolution is downsampled when the window still has too many points
+        fig = get_line_data(frame, max_points)
+        layout = fig['layout']
+        layout.update(
+            title=dict(text=f'Power Consumption Over Time ({TIERS[tier]} maxima)'),
+            dragmode='zoom',
+            uirevision='line-chart'  # Keep the hidden zones when the data is replaced
+        )
+        layout['xaxis']['fixedrange'] = False  # Zoom on the time axis only
+        if start is not None and end is not None:
+            layout['xaxis']['range'] = [pd.Timestamp(start).isoformat(), pd.Timestamp(end).isoformat()]
+
+        return fig
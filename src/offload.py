@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: offload.py
+    Purpose: Contains the offloading of the heavy figure builders to a pool of processes.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to run the figure builders of the callbacks in worker
+    processes, so that concurrent requests of a threaded server build their figures on several
+    cores instead of taking turns on the GIL. The workers attach to the DataFrames through shared
+    memory (see shared.py) rather than receiving pickled copies, and send back the JSON of the
+    compacted figures.
+
+    The pool is created on first use and replaced when the data is reloaded. It reuses the frames
+    published by the loader process when POWER_SHARED_MANIFEST is set, and publishes the frames of
+    the current data itself otherwise.
+
+    Set POWER_OFFLOAD_PROCESSES to the number of worker processes to enable it; 0, the default,
+    builds the figures on the request thread.
+'''
+
+import atexit
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from plotly.io.json import to_json_plotly
+
+import clusteredBarChart as cbc
+import globals  # pylint: disable=redefined-builtin
+import lineChart as lc
+import precompute
+import serialize
+import shared
+
+# Number of worker processes building the figures; 0 builds them on the request thread
+PROCESSES = int(os.environ.get('POWER_OFFLOAD_PROCESSES', '0'))
+
+# Pool of the current data, with the shared memory it published
+_pool = {'data': None, 'executor': None, 'segments': [], 'manifest': None}
+_pool_lock = threading.Lock()
+
+# Artifacts built by a worker process from its frames, by name
+_artifacts = {}
+
+
+def is_enabled():
+    """
+    Check whether the figure builders run in worker processes.
+
+    Returns:
+        bool: True if POWER_OFFLOAD_PROCESSES is set.
+    """
+    return PROCESSES > 0
+
+
+def _get_artifact(name, builder):
+    """
+    Get an artifact of the frames of a worker process, building it on first use.
+
+    Parameters:
+        name (str): The name of the artifact.
+        builder (callable): Builds the artifact from the Dataset.
+
+    Returns:
+        The artifact.
+    """
+    if name not in _artifacts:
+        _artifacts[name] = builder(globals.get_dataset())
+    return _artifacts[name]
+
+
+def _build_line_window(start, end):
+    """
+    Build the zoomable line chart of a time window.
+
+    Parameters:
+        start (str): The start of the window.
+        end (str): The end of the window.
+
+    Returns:
+        dict: The compacted figure.
+    """
+    tiers = _get_artifact('line_tiers', lambda data: lc.LineTiers(data.df, data.df_hourly, data.df_daily))
+    return serialize.compact_figure(tiers.get_figure(start, end))
+
+
+def _build_dropdown_figure(chart, x_col, y_col):
+    """
+    Build the figure of a dropdown selection.
+
+    Parameters:
+        chart (str): The chart, 'scatter' or 'bubble'.
+        x_col (str): The column on the x-axis.
+        y_col (str): The column on the y-axis.
+
+    Returns:
+        dict: The compacted figure.
+    """
+    data = globals.get_dataset()
+    frames = {'df': data.df, 'df_hourly': data.df_hourly, 'df_daily': data.df_daily}
+    return serialize.compact_figure(precompute.build_figure(frames, (chart, x_col, y_col)))
+
+
+def _build_month_charts(selected_months):
+    """
+    Build the bar charts of the power consumption of the selected months.
+
+    Parameters:
+        selected_months (list): The selected months.
+
+    Returns:
+        tuple: The figures of the zone chart and of the month chart.
+    """
+    charts = _get_artifact('monthly_charts', lambda data: cbc.MonthlyCharts(data.df_daily))
+    return charts.get_figures(selected_months)
+
+
+# Builders that can run in the worker processes, by task name
+TASKS = {
+    'line_window': _build_line_window,
+    'dropdown_figure': _build_dropdown_figure,
+    'month_charts': _build_month_charts
+}
+
+
+def _init_worker(manifest_path, version, published):
+    """
+    Attach a worker process to the frames published in shared memory.
+
+    Parameters:
+        manifest_path (str): The path of the manifest of the frames.
+        version (int): The version of the data.
+        published (bool): Whether the server process published the frames, in which case the
+            worker shares its resource tracker and leaves the segments registered there.
+    """
+    cache_key, frames = shared.attach(manifest_path, untrack=not published)
+    globals.dataset = globals.Dataset(globals.file_path, globals.compact, version, frames=frames,
+                                      cache_key=cache_key)
+
+
+def _run_task(task, args):
+    """
+    Run a builder in a worker process and serialize its result.
+
+    Parameters:
+        task (str): The name of the builder, a key of TASKS.
+        args (tuple): The arguments of the builder.
+
+    Returns:
+        str: The JSON of the result.
+    """
+    return to_json_plotly(TASKS[task](*args))
+
+
+def _retire(executor, segments, manifest_path):
+    """
+    Shut down the pool of a previous version of the data and release its shared memory.
+
+    Parameters:
+        executor (ProcessPoolExecutor): The pool.
+        segments (list): The shared memory segments published for the pool.
+        manifest_path (str): The manifest published for the pool, None if it was not published.
+    """
+    executor.shutdown(wait=True)
+    shared.release(segments)
+    if manifest_path is not None and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+def _is_published(data):
+    """
+    Check whether the loader process published the frames of a version of the data.
+
+    Parameters:
+        data (Dataset): The set of DataFrames.
+
+    Returns:
+        bool: True if the frames of the manifest of POWER_SHARED_MANIFEST are those of the data.
+    """
+    if not globals.shared_manifest or not os.path.exists(globals.shared_manifest):
+        return False
+    manifest = shared.read_manifest(globals.shared_manifest)
+
+    # Readings appended since the publication are only in the frames of the server
+    return manifest['cache_key'] == data.get_cache_key() and manifest['frames']['df']['rows'] == len(data.df)
+
+
+def _get_executor(data):
+    """
+    Get the pool of worker processes attached to a version of the data, creating it on first use.
+
+    The caller holds _pool_lock, so that the pool is not retired before its tasks are submitted.
+
+    Parameters:
+        data (Dataset): The set of DataFrames.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+    """
+    if _pool['data'] is data:
+        return _pool['executor']
+
+    previous = (_pool['executor'], _pool['segments'], _pool['manifest'])
+
+    if _is_published(data):
+        # The loader process already published these frames
+        manifest_path, segments, published_path = globals.shared_manifest, [], None
+    else:
+        descriptor, manifest_path = tempfile.mkstemp(prefix='power-offload-', suffix='.json')
+        os.close(descriptor)
+        segments, published_path = shared.publish(data, manifest_path), manifest_path
+
+    # Spawned workers do not inherit the threads and locks of the server
+    executor = ProcessPoolExecutor(PROCESSES, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_worker,
+                                   initargs=(manifest_path, data.version, published_path is not None))
+    _pool.update(data=data, executor=executor, segments=segments, manifest=published_path)
+
+    # The tasks already submitted to the previous pool finish before it is shut down
+    if previous[0] is not None:
+        threading.Thread(target=_retire, args=previous, name='offload-retire', daemon=True).start()
+    return executor
+
+
+# Function to build a figure in a worker process
+def run(task, *args):
+    """
+    Build a figure in a worker process attached to the current data.
+
+    Parameters:
+        task (str): The name of the builder, a key of TASKS.
+        args: The arguments of the builder, serializable to JSON.
+
+    Returns:
+        The result of the builder, decoded from its JSON.
+    """
+    # Submitting under the lock keeps a concurrent swap of the data from retiring the pool first
+    with _pool_lock:
+        future = _get_executor(globals.get_dataset()).submit(_run_task, task, args)
+    return json.loads(future.result())
+
+
+def shutdown():
+    """
+    Shut down the pool of worker processes and release the shared memory it published.
+    """
+    with _pool_lock:
+        executor, segments, manifest_path = _pool['executor'], _pool['segments'], _pool['manifest']
+        _pool.update(data=None, executor=None, segments=[], manifest=None)
+    if executor is not None:
+        _retire(executor, segments, manifest_path)
+
+
+atexit.register(shutdown)
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: precompute.py
+    Purpose: Contains the precomputation of the figures selected by the dropdowns.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to build, once per version of the data, every figure that
+    the dropdowns of the scatter plot and the bubble plot can select. The figures are built in a
+    process pool, compacted and serialized to JSON by the workers, so the callbacks only look them
+    up in a table. The workers are spawned rather than forked, since the figures are built from
+    reload threads of the server, which must not fork its other threads' locks. Set POWER_PRECOMPUTE_PROCESSES=0 to build them in the server process instead.
+'''
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+from plotly.io.json import to_json_plotly
+
+import BubblePlot as bp
+import downsample
+import ScatterPlotChart as spc
+import serialize
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Columns offered by the x and y dropdowns
+DROPDOWN_COLUMNS = ['Humidity', 'Temperature', 'WindSpeed']
+
+# Number of processes building the figures; 0 builds them in the current process
+PROCESSES = int(os.environ.get('POWER_PRECOMPUTE_PROCESSES', str(min(4, os.cpu_count() or 1))))
+
+# Frames used by the builders of a worker process, set by _init_worker
+_frames = {}
+
+
+def get_figure_keys():
+    """
+    Get the keys of all the figures reachable from the dropdowns.
+
+    Returns:
+        list: The (chart, x column, y column) keys.
+    """
+    pairs = list(product(DROPDOWN_COLUMNS, repeat=2))
+    return ([('scatter', x_col, y_col) for x_col, y_col in pairs]
+            + [('bubble', x_col, y_col) for x_col, y_col in pairs])
+
+
+def build_figure(frames, key):
+    """
+    Build the figure of a key with the chart modules.
+
+    Parameters:
+        frames (dict): The DataFrames, by name.
+        key (tuple): The (chart, x column, y column) key of the figure.
+
+    Returns:
+        dict: The figure.
+    """
+    chart, x_col, y_col = key
+    if chart == 'scatter':
+        return spc.get_ScatterPlotChart(frames['df_hourly'], x_col, y_col, downsample.MAX_SCATTER_POINTS)
+    if chart == 'bubble':
+        return bp.get_bubble_plot(frames['df_daily'], x_col, y_col)
+    if chart == 'scatter_3zones':
+        return spc.get_ScatterPlotChart_3Zones(x_col, frames['df_daily'])
+    raise ValueError(f'Unknown chart: {chart}')
+
+
+def _get_peak_memory():
+    """
+    Get the peak resident memory of the current process since it started.
+
+    Returns:
+        int: The peak memory in bytes, 0 if unknown.
+    """
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux
+    return 1024 * resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _init_worker(frames):
+    """
+    Keep the DataFrames sent to a worker process for the figures it builds.
+
+    Parameters:
+        frames (dict): The DataFrames, by name.
+    """
+    _frames.update(frames)
+
+
+def _serialize_figure(key, figure):
+    """
+    Compact a figure and serialize it.
+
+    Parameters:
+        key (tuple): The (chart, x column, y column) key of the figure.
+        figure (dict): The figure.
+
+    Returns:
+        tuple: The key, the JSON of the compacted figure and the size of the JSON of the original one.
+    """
+    return key, to_json_plotly(serialize.compact_figure(figure)), len(to_json_plotly(figure))
+
+
+def _build_figure_json(key):
+    """
+    Build the figure of a key in a worker process and serialize it.
+
+    Parameters:
+        key (tuple): The (chart, x column, y column) key of the figure.
+
+    Returns:
+        tuple: The key, the JSON of the compacted figure, the size of the JSON of the original one
+            and the peak memory of the worker so far.
+    """
+    return (*_serialize_figure(key, build_figure(_frames, key)), _get_peak_memory())
+
+
+class FigureTable:
+    """
+    Figures of every dropdown selection, decoded from their JSON once.
+
+    Attributes:
+        figures (dict): The figure dictionaries, by (chart, x column, y column) key.
+        build_time (float): The wall-clock time of the build, in seconds.
+        json_bytes (int): The total size of the JSON of the figures.
+        peak_memory (int): The peak resident memory in bytes, 0 if unknown, of the largest worker
+            process started for the build, or of the server process since it started when the
+            figures were built in it.
+        in_process (bool): Whether the figures were built in the server process.
+    """
+
+    def __init__(self, figures, build_time, json_bytes, peak_memory, in_process=False):
+        self.figures = figures
+        self.build_time = build_time
+        self.json_bytes = json_bytes
+        self.peak_memory = peak_memory
+        self.in_process = in_process
+
+    def get(self, chart, x_col, y_col=None):
+        """
+        Get a precomputed figure.
+
+        Parameters:
+            chart (str): The chart, 'scatter', 'bubble' or 'scatter_3zones'.
+            x_col (str): The column on the x-axis.
+            y_col (str): The column on the y-axis, None for the 3-zone scatter plot.
+
+        Returns:
+            dict: The figure, or None if this selection was not precomputed.
+        """
+        return self.figures.get((chart, x_col, y_col))
+
+    def report(self):
+        """
+        Describe the cost of the build.
+
+        Returns:
+            str: The number of figures, the build time and the memory used.
+        """
+        scope = 'server process peak' if self.in_process else 'peak memory per worker'
+        return (f'{len(self.figures)} figures in {self.build_time:.2f}s, '
+                f'{self.json_bytes / 1e6:.1f} MB of JSON, {scope} {self.peak_memory / 1e6:.0f} MB')
+
+
+# Function to build the figures of every dropdown selection
+def build_figure_table(data, processes=None):
+    """
+    Build the figures of every dropdown selection, in a process pool unless processes is 0.
+
+    Parameters:
+        data (Dataset): The set of DataFrames to build the figures from.
+        processes (int): The number of worker processes, defaults to POWER_PRECOMPUTE_PROCESSES.
+
+    Returns:
+        FigureTable: The figures.
+    """
+    processes = PROCESSES if processes is None else processes
+    keys = get_figure_keys()
+    frames = {'df': data.df, 'df_hourly': data.df_hourly, 'df_daily': data.df_daily}
+
+    start = time.perf_counter()
+    if processes > 0:
+        # The frames are sent once to each worker, the figures come back as JSON; spawned workers do
+        # not inherit the locks held by the other threads of the server
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(frames,)) as executor:
+            results = list(executor.map(_build_figure_json, keys))
+    else:
+        results = [(*_serialize_figure(key, build_figure(frames, key)), _get_peak_memory()) for key in keys]
+
+    figures = {key: json.loads(figure_json) for key, figure_json, _, _ in results}
+    build_time = time.perf_counter() - start
+    for key, figure_json, original_bytes, _ in results:
+        serialize.record_savings(' '.join(filter(None, key)), original_bytes, len(figure_json))
+
+    # The workers are started for this build, so their peak memory is the one of the build
+    peak_memory = max((peak for _, _, _, peak in results), default=0)
+    return FigureTable(figures, build_time, sum(len(figure_json) for _, figure_json, _, _ in results), peak_memory,
+                       in_process=processes <= 0)
@@ -13,8 +13,188 @@
     This file provides the functionality to preprocess data for visualizing power consumption across different zones.
 '''
 
+import functools
+from datetime import date
+
+import numpy as np
 import pandas as pd
 
+import aggregate
+
+try:
+    import pyarrow  # noqa: F401 pylint: disable=unused-import
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Version of the preprocessing output, to be bumped whenever the produced frames change
+PREPROCESS_VERSION = 3
+
+# Schema of the Tetouan power consumption data
+DATETIME_COLUMN = 'Datetime'
+DATETIME_FORMAT = '%m/%d/%Y %H:%M'
+CSV_DTYPES = {
+    'Temperature': 'float64',
+    'Humidity': 'float64',
+    'WindSpeed': 'float64',
+    'GeneralDiffuseFlows': 'float64',
+    'DiffuseFlows': 'float64',
+    'PowerConsumption_Zone1': 'float64',
+    'PowerConsumption_Zone2': 'float64',
+    'PowerConsumption_Zone3': 'float64'
+}
+
+# Short aliases of the zone power consumption columns
+ZONE_ALIASES = {
+    'PowerConsumption_Zone1': 'Zone1',
+    'PowerConsumption_Zone2': 'Zone2',
+    'PowerConsumption_Zone3': 'Zone3'
+}
+
+# Number of decimals shown for the measures, which bounds the error allowed when downcasting them
+DISPLAY_DECIMALS = 2
+
+# Labels of the calendar dimensions
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+# Hour dimension, indexed by the hour of the day
+HOUR_DIMENSION = pd.DataFrame(
+    {'hourNo': np.arange(1, 25, dtype='int8')},
+    index=pd.Index(np.arange(24, dtype='int8'), name='hour')
+)
+
+
+# Function to read the raw data from a CSV file
+def read_raw_data(file_path, engine=None):
+    """
+    Read the raw data from a CSV file using the explicit schema of the data.
+
+    Parameters:
+        file_path (str): The file path to the CSV file.
+        engine (str): The CSV parser engine. Defaults to the multithreaded 'pyarrow'
+            engine when it is installed, and to the 'c' engine otherwise.
+
+    Returns:
+        DataFrame: The raw data, with the datetime column converted to datetime format.
+    """
+    if engine is None:
+        engine = 'pyarrow' if HAS_PYARROW else 'c'
+
+    # Only read the known columns, with their types fixed up front
+    df = pd.read_csv(
+        file_path,
+        usecols=[DATETIME_COLUMN, *CSV_DTYPES],
+        dtype=CSV_DTYPES,
+        engine=engine
+    )
+
+    return parse_datetime(df)
+
+
+# Function to parse the datetime column of the raw data
+def parse_datetime(df):
+    """
+    Convert the datetime column of the raw data to datetime format.
+
+    Parameters:
+        df (DataFrame): The raw data, with the 'Datetime' column as strings or datetimes.
+
+    Returns:
+        DataFrame: The raw data with the added 'datetime' column.
+    """
+    # Parse the datetime column with the fixed format, falling back to inference for other exports
+    try:
+        df['datetime'] = pd.to_datetime(df[DATETIME_COLUMN], format=DATETIME_FORMAT)
+    except ValueError:
+        df['datetime'] = pd.to_datetime(df[DATETIME_COLUMN])
+
+    return df
+
+
+# Function to convert a date to its integer day key
+def to_day_key(day):
+    """
+    Convert a date to its integer day key, the number of days since 1970-01-01.
+
+    Parameters:
+        day (date or str): The date, or a date string in the format 'YYYY-MM-DD'.
+
+    Returns:
+        int: The day key.
+    """
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal() - date(1970, 1, 1).toordinal()
+
+
+# Function to build the date dimension for a range of day keys
+@functools.lru_cache(maxsize=8)
+def get_date_dimension(first_day_key, last_day_key):
+    """
+    Build the date dimension table, with one row per calendar day.
+
+    The returned frame is shared between callers and must not be modified.
+
+    Parameters:
+        first_day_key (int): The day key of the first day.
+        last_day_key (int): The day key of the last day.
+
+    Returns:
+        DataFrame: The calendar labels of each day, indexed by day key.
+    """
+    day_keys = np.arange(first_day_key, last_day_key + 1, dtype='int32')
+    dates = pd.DatetimeIndex(day_keys.astype('datetime64[D]'))
+    day_of_week = dates.dayofweek.to_numpy()
+
+    return pd.DataFrame(
+        {
+            'date': dates.date,
+            'week': dates.isocalendar()['week'].to_numpy().astype('int8'),
+            'day_of_week': day_of_week.astype('int8'),
+            'DayName': pd.Categorical.from_codes(day_of_week, DAY_NAMES),
+            'MonthName': pd.Categorical.from_codes(dates.month.to_numpy() - 1, MONTH_NAMES),
+            'MonthNumber': dates.month.to_numpy().astype('int8'),
+            'DayOfMonth': dates.day.to_numpy().astype('int8'),
+            'DayOfYear': dates.dayofyear.to_numpy().astype('int16')
+        },
+        index=pd.Index(day_keys, name='day_key')
+    )
+
+
+# Function to resolve calendar labels through the date and hour dimensions
+def attach_calendar(df, columns):
+    """
+    Add calendar label columns to a frame keyed by 'day_key' (and 'hour').
+
+    Parameters:
+        df (DataFrame): The frame containing a 'day_key' column, and an 'hour' column
+            for hour labels.
+        columns (list): The label columns to add, from the date dimension or the hour dimension.
+
+    Returns:
+        DataFrame: A copy of the frame with the label columns added.
+    """
+    labels = {}
+    day_columns = [col for col in columns if col not in HOUR_DIMENSION.columns]
+    if day_columns:
+        day_keys = df['day_key'].to_numpy()
+        first_day_key = int(day_keys.min()) if len(day_keys) else 0
+        last_day_key = int(day_keys.max()) if len(day_keys) else 0
+        date_dimension = get_date_dimension(first_day_key, last_day_key)
+
+        # Day keys are contiguous in the dimension, so the row of a day is an offset
+        positions = day_keys - first_day_key
+        for col in day_columns:
+            labels[col] = date_dimension[col].array.take(positions)
+
+    for col in columns:
+        if col in HOUR_DIMENSION.columns:
+            labels[col] = HOUR_DIMENSION[col].to_numpy()[df['hour'].to_numpy()]
+
+    return df.assign(**labels)
+
 
 # Function to preprocess raw data from a CSV file
 def data_preprocess(file_path):
@@ -30,36 +210,107 @@ def data_preprocess(file_path):
     if file_path is None:
         file_path = './assets/data/powerconsumption.csv'
 
-    # Read the data from the CSV file
-    df = pd.read_csv(file_path)
-    
-    # Convert the datetime column to datetime format
-    df['datetime'] = pd.to_datetime(df['Datetime'])
-    
-    # Extract date and other time-based features
-    df['date'] = df['datetime'].dt.date
-    df['weekofyear'] = df['datetime'].dt.isocalendar().week
-    df['day_of_week'] = df['datetime'].dt.dayofweek
-    df['week'] = df['datetime'].dt.isocalendar().week
-    df['hour'] = df['datetime'].dt.hour
-    df['time'] = df['datetime'].dt.time
-    df['DayName'] = df['datetime'].dt.day_name()
-    df['MonthName'] = df['datetime'].dt.month_name()
-    df['hourNo'] = df['datetime'].dt.hour + 1
-    df['MonthNumber'] = df['datetime'].dt.month
-    df['DayOfMonth'] = df['datetime'].dt.day
-    df['DayOfYear'] = df['datetime'].dt.dayofyear
-    
+    # Read the data from the CSV file and convert the datetime column to datetime format
+    return preprocess_raw_data(read_raw_data(file_path))
+
+
+# Function to preprocess raw data rows
+def preprocess_raw_data(df):
+    """
+    Preprocess raw data rows, as read from the CSV file, for further analysis.
+
+    Parameters:
+        df (DataFrame): The raw data, with the 'datetime' column in datetime format.
+
+    Returns:
+        DataFrame: The preprocessed data as a pandas DataFrame.
+    """
+    df = df.drop(columns=DATETIME_COLUMN)
+
+    # Extract the integer day and hour keys; calendar labels are resolved through the date dimension
+    timestamps = df['datetime'].to_numpy()
+    days = timestamps.astype('datetime64[D]')
+    df['day_key'] = days.astype('int64').astype('int32')
+    df['hour'] = (timestamps.astype('datetime64[h]') - days).astype('int8')
+
     # Calculate total power consumption across all zones
-    df['PowerConsumption_AllZones'] = (df['PowerConsumption_Zone1'] + 
-                                       df['PowerConsumption_Zone2'] + 
+    df['PowerConsumption_AllZones'] = (df['PowerConsumption_Zone1'] +
+                                       df['PowerConsumption_Zone2'] +
                                        df['PowerConsumption_Zone3'])
-    df['Zone1'] = df['PowerConsumption_Zone1']
-    df['Zone2'] = df['PowerConsumption_Zone2']
-    df['Zone3'] = df['PowerConsumption_Zone3']
 
     return df
 
+
+# Function to store a frame in compact form
+def compact_frame(df, decimals=DISPLAY_DECIMALS):
+    """
+    Downcast the columns of a frame to smaller types where the precision allows it.
+
+    Float columns are stored as float32 when the round trip error stays below half a unit of the
+    last displayed decimal, and string columns are stored as categoricals.
+
+    Parameters:
+        df (DataFrame): The frame to compact.
+        decimals (int): The number of decimals that must be preserved.
+
+    Returns:
+        DataFrame: The compacted frame.
+    """
+    tolerance = 0.5 * 10 ** -decimals
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == 'float64' and len(values):
+            downcast = values.to_numpy().astype('float32')
+            error = np.nanmax(np.abs(downcast - values.to_numpy()), initial=0)
+            if error <= tolerance:
+                values = pd.Series(downcast, index=df.index, name=col)
+        elif values.dtype == 'object':
+            values = values.astype('category')
+        columns[col] = values
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+# Function to compare the memory usage of a frame before and after compaction
+def memory_report(before, after):
+    """
+    Report the number of bytes used by each column of a frame before and after compaction.
+
+    Parameters:
+        before (DataFrame): The original frame.
+        after (DataFrame): The compacted frame.
+
+    Returns:
+        DataFrame: The bytes per column before and after, with a 'Total' row.
+    """
+    report = pd.DataFrame({
+        'before': before.memory_usage(index=False, deep=True),
+        'after': after.memory_usage(index=False, deep=True)
+    }).fillna(0).astype('int64')
+    report.loc['Total'] = report.sum()
+    report['ratio'] = (report['before'] / report['after'].where(report['after'] > 0)).round(2)
+
+    return report
+
+
+# Function to access the zone columns under their short aliases
+def zone_aliases(df):
+    """
+    Get a view of a frame with the zone columns renamed to their short aliases ('Zone1', ...).
+
+    The returned frame shares the column data of the original one instead of copying it, so the
+    aliases cost no memory.
+
+    Parameters:
+        df (DataFrame): A frame containing the 'PowerConsumption_Zone1..3' columns.
+
+    Returns:
+        DataFrame: The frame with the aliased zone columns.
+    """
+    return df.rename(columns=ZONE_ALIASES, copy=False)
+
+
 # Function to aggregate data on an hourly basis
 def get_HourlyData(df):
     """
@@ -69,25 +320,10 @@ def get_HourlyData(df):
         df (DataFrame): The preprocessed data DataFrame.
 
     Returns:
-        DataFrame: The hourly aggregated data.
+        DataFrame: The hourly aggregated data, keyed by 'day_key' and 'hour'.
     """
-    # Columns to average and to find the maximum
-    columns_to_avg = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows']
-    columns_to_max = ['PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3',
-                      'PowerConsumption_AllZones']
-
-    # Group by specified columns and aggregate
-    HourlyData = df.groupby(
-        ['date', 'week', 'hour', 'DayName', 'MonthName', 'hourNo', 'MonthNumber', 'DayOfMonth', 'DayOfYear',
-         'weekofyear', 'day_of_week']
-    ).agg(
-        {**{col: 'mean' for col in columns_to_avg}, **{col: 'max' for col in columns_to_max}}
-    ).reset_index()
+    return aggregate.aggregate(df, ['hour'])['hour']
 
-    # Combine date and hour into a single datetime column for plotting
-    HourlyData['datetime1'] = HourlyData['date'] + pd.to_timedelta(HourlyData['hour'], unit='h')
-
-    return HourlyData
 
 # Function to aggregate data on a daily basis
 def get_DailyData(df):
@@ -98,18 +334,6 @@ def get_DailyData(df):
         df (DataFrame): The preprocessed data DataFrame.
 
     Returns:
-        DataFrame: The daily aggregated data.
+        DataFrame: The daily aggregated data, keyed by 'day_key'.
     """
-    # Columns to average and to find the maximum
-    columns_to_avg = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows']
-    columns_to_max = ['PowerConsumption_Zone1', 'PowerConsumption_Zone2', 'PowerConsumption_Zone3',
-                      'PowerConsumption_AllZones']
-
-    # Group by specified columns and aggregate
-    DailyData = df.groupby(
-        ['date', 'week', 'DayName', 'MonthName', 'MonthNumber', 'DayOfMonth', 'DayOfYear', 'day_of_week']
-    ).agg(
-        {**{col: 'mean' for col in columns_to_avg}, **{col: 'max' for col in columns_to_max}}
-    ).reset_index()
-
-    return DailyData
+    return aggregate.aggregate(df, ['day'])['day']
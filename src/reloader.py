@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: reloader.py
+    Purpose: Contains the hot reload of the data file while the server is running.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to detect a new data file, by polling its modification
+    time and content hash or through the /admin/reload endpoint, and to rebuild the DataFrames and
+    the figures of the initial layout in a background thread. The rebuilt set is swapped in
+    atomically by globals.reload_data, so the callbacks keep serving the previous data until then.
+
+    Under gunicorn the data is rebuilt by a background thread of the master process instead, and
+    the workers are replaced gracefully once it is done (see gunicorn.conf.py): the workers only
+    forward the reload requests to it.
+
+    The /admin endpoints of the app require the token of POWER_ADMIN_TOKEN in the X-Admin-Token
+    header; when it is not set, they only answer the requests from the local host.
+'''
+
+import os
+import threading
+import time
+
+from flask import jsonify, request
+
+import globals  # pylint: disable=redefined-builtin
+
+# Interval in seconds between two checks of the data file; set POWER_RELOAD_INTERVAL=0 to disable polling
+POLL_INTERVAL = float(os.environ.get('POWER_RELOAD_INTERVAL', '30'))
+
+# Token required by the /admin endpoints in the X-Admin-Token header; without it, they only answer
+# the requests from the local host
+ADMIN_TOKEN = os.environ.get('POWER_ADMIN_TOKEN')
+
+# Addresses of the local host, allowed on the /admin endpoints when no token is set
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+# Background thread rebuilding the data, if any
+_reload_thread = None
+_reload_lock = threading.Lock()
+
+# Function handling the reload requests in place of a rebuild in this process, if any
+_reload_handler = None
+
+
+def _get_file_signature(file_path):
+    """
+    Get a cheap signature of a file, to detect changes before hashing it.
+
+    Parameters:
+        file_path (str): The path of the file.
+
+    Returns:
+        tuple: The modification time and the size of the file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def has_data_changed():
+    """
+    Check whether the content of the data file differs from the data currently served.
+
+    Returns:
+        bool: True if the data file changed.
+    """
+    source_key = globals.get_source_key()
+    return source_key is not None and source_key != globals.get_dataset().get_cache_key()
+
+
+def set_reload_handler(handler):
+    """
+    Handle the reload requests with a function instead of rebuilding the data in this process.
+
+    Parameters:
+        handler (callable): Called without arguments on every reload request, None to rebuild
+            the data in this process again.
+    """
+    global _reload_handler  # pylint: disable=global-statement
+    _reload_handler = handler
+
+
+def is_reloading():
+    """
+    Check whether a rebuild of the data is in progress in this process.
+
+    Returns:
+        bool: True if the data is being rebuilt.
+    """
+    with _reload_lock:
+        return _reload_thread is not None and _reload_thread.is_alive()
+
+
+def _reload(on_done):
+    """
+    Rebuild the data, then call a function with the new set.
+
+    Parameters:
+        on_done (callable): Called with the new Dataset once it is swapped in, if any.
+    """
+    data = globals.reload_data()
+    if on_done is not None:
+        on_done(data)
+
+
+def request_reload(on_done=None):
+    """
+    Rebuild the data in a background thread, unless a rebuild is already in progress.
+
+    Parameters:
+        on_done (callable): Called with the new Dataset once it is swapped in, from the
+            background thread.
+
+    Returns:
+        bool: True if a rebuild was started.
+    """
+    global _reload_thread  # pylint: disable=global-statement
+
+    if _reload_handler is not None:
+        _reload_handler()
+        return True
+
+    with _reload_lock:
+        if _reload_thread is not None and _reload_thread.is_alive():
+            return False
+        _reload_thread = threading.Thread(target=_reload, args=(on_done,), name='data-reload', daemon=True)
+        _reload_thread.start()
+        return True
+
+
+def _watch_data_file(interval, on_change):
+    """
+    Poll the data file and rebuild the data when its content changes.
+
+    Parameters:
+        interval (float): The interval in seconds between two checks.
+        on_change (callable): Called without arguments when the content of the file changes,
+            returns False if the reload could not start, in which case it is retried at the next
+            check.
+    """
+    signature = _get_file_signature(globals.get_source_path())
+    while True:
+        time.sleep(interval)
+
+        # Only hash the file when its modification time or size changed
+        new_signature = _get_file_signature(globals.get_source_path())
+        if new_signature != signature and new_signature is not None:
+            # A file changed during a rebuild in progress is only recorded once its reload starts
+            if not has_data_changed() or on_change() is not False:
+                signature = new_signature
+
+
+def start_watcher(interval=POLL_INTERVAL, on_change=request_reload):
+    """
+    Start polling the data file in a daemon thread.
+
+    Parameters:
+        interval (float): The interval in seconds between two checks, 0 to disable polling.
+        on_change (callable): Called without arguments when the content of the file changes,
+            defaults to a rebuild of the data in this process; returns False if the reload could
+            not start, to retry it at the next check.
+
+    Returns:
+        Thread: The polling thread, or None if polling is disabled.
+    """
+    if interval <= 0:
+        return None
+    watcher = threading.Thread(target=_watch_data_file, args=(interval, on_change), name='data-watcher', daemon=True)
+    watcher.start()
+    return watcher
+
+
+def is_admin_request():
+    """
+    Check whether the current request may use the /admin endpoints.
+
+    Returns:
+        bool: True if the request carries POWER_ADMIN_TOKEN, or comes from the local host when no
+            token is set.
+    """
+    if ADMIN_TOKEN:
+        return request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+    return request.remote_addr in LOCAL_ADDRESSES
+
+
+def register_admin_endpoint(server):
+    """
+    Add the /admin/reload endpoint, which triggers a rebuild of the data, to the Flask server.
+
+    Parameters:
+        server (Flask): The Flask server of the Dash app.
+    """
+    @server.route('/admin/reload', methods=['POST'])
+    def admin_reload():  # pylint: disable=unused-variable
+        if not is_admin_request():
+            return jsonify(error='forbidden'), 403
+
+        started = request_reload()
+        return jsonify(started=started, version=globals.get_dataset().version), 202
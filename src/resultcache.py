@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: resultcache.py
+    Purpose: Contains the persistent cache of the results of the callbacks.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to store the figures returned by the callbacks in a SQLite
+    file, shared by the worker processes and kept across restarts. A result is keyed by the name of
+    the callback, its normalized inputs and the data it was computed from: the content hash of the
+    data file and the number of rows, so that a new data file or appended readings never hit the
+    results of the previous data, which are purged when a result of the new data is stored.
+
+    The file is bounded in size: the least recently used results are evicted first. Hits and
+    misses are counted by callback in the same file, and reported by /admin/cache. A hit only reads
+    the file: the times of use and the counters are kept in memory and written in one transaction
+    every FLUSH_INTERVAL seconds or with the next stored result, so that the workers do not queue
+    on the write lock to answer hits. The decoded results most recently used by a process are also
+    kept in its memory, so that hot results are not read and parsed again on every call.
+
+    Set POWER_RESULT_CACHE=0 to disable the cache, POWER_RESULT_CACHE_PATH to move the file,
+    POWER_RESULT_CACHE_MB to change its maximum size and POWER_RESULT_CACHE_FLUSH to change the
+    interval of the writes of the counters.
+'''
+
+import atexit
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify, request
+from plotly.io.json import to_json_plotly
+
+import cache
+import globals  # pylint: disable=redefined-builtin
+import reloader
+
+# Whether the results of the callbacks are cached
+ENABLED = os.environ.get('POWER_RESULT_CACHE', '1') != '0'
+
+# Path of the SQLite file of the cache, next to the cached frames
+CACHE_PATH = os.environ.get('POWER_RESULT_CACHE_PATH', os.path.join(cache.CACHE_DIR, 'results.sqlite'))
+
+# Maximum total size of the cached results, in bytes
+MAX_BYTES = int(float(os.environ.get('POWER_RESULT_CACHE_MB', '256')) * 1e6)
+
+# Fraction of the maximum size left after an eviction, so that eviction does not run on every store
+EVICTION_TARGET = 0.9
+
+# Seconds a connection waits for the lock of another process before giving up
+LOCK_TIMEOUT = 5
+
+# Seconds between two writes of the times of use and the counters of the hits
+FLUSH_INTERVAL = float(os.environ.get('POWER_RESULT_CACHE_FLUSH', '10'))
+
+# Number of decoded results kept in the memory of each process
+MEMORY_ENTRIES = 32
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    data_key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+'''
+
+# Connections of the threads of this process
+_local = threading.local()
+
+# Data key of the last result stored by this process, to purge the results of older data once
+_last_data_key = {'value': None}
+
+# Times of use and counters not yet written to the file, and the decoded results of this process
+_pending = {'last_used': {}, 'stats': {}, 'flushed': time.monotonic()}
+_memory = OrderedDict()
+_pending_lock = threading.Lock()
+
+
+def _connect():
+    """
+    Get the connection of the current thread to the cache file, opening it on first use.
+
+    Connections are never shared between threads, nor inherited by forked worker processes.
+
+    Returns:
+        Connection: The connection.
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is not None and _local.pid == os.getpid():
+        return connection
+
+    os.makedirs(os.path.dirname(CACHE_PATH) or '.', exist_ok=True)
+    connection = sqlite3.connect(CACHE_PATH, timeout=LOCK_TIMEOUT, isolation_level=None)
+
+    # Write-ahead logging lets the readers of other processes work while a result is stored
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    _local.connection, _local.pid = connection, os.getpid()
+    return connection
+
+
+def get_data_key(data):
+    """
+    Get the key of the data that the results are computed from.
+
+    Parameters:
+        data (Dataset): The set of DataFrames.
+
+    Returns:
+        str: The content hash of the data file and the number of rows of the data.
+    """
+    return f'{data.get_cache_key()}-{len(data.df)}'
+
+
+def get_key(name, inputs, data_key):
+    """
+    Get the key of a result.
+
+    Parameters:
+        name (str): The name of the callback.
+        inputs (list): The normalized inputs of the callback, serializable to JSON.
+        data_key (str): The key of the data, see get_data_key.
+
+    Returns:
+        str: The hexadecimal key.
+    """
+    text = json.dumps([name, inputs, data_key], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _record(name, key, hit):
+    """
+    Record the use of a result and the hit or the miss in memory, until the next flush.
+
+    Parameters:
+        name (str): The name of the callback.
+        key (str): The key of the result.
+        hit (bool): Whether the result was cached.
+    """
+    with _pending_lock:
+        if hit:
+            _pending['last_used'][key] = time.time()
+        counts = _pending['stats'].setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+
+def _write_pending(connection):
+    """
+    Write the times of use and the counters recorded since the last flush.
+
+    Parameters:
+        connection (Connection): The connection to the cache file, in a write transaction.
+    """
+    with _pending_lock:
+        last_used, stats = _pending['last_used'], _pending['stats']
+        _pending.update(last_used={}, stats={}, flushed=time.monotonic())
+
+    try:
+        connection.executemany('UPDATE results SET last_used = MAX(last_used, ?) WHERE key = ?',
+                               [(used, key) for key, used in last_used.items()])
+        connection.executemany('INSERT INTO stats (name, hits, misses) VALUES (?, ?, ?) ON CONFLICT (name) '
+                               'DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses',
+                               [(name, hits, misses) for name, (hits, misses) in stats.items()])
+    except sqlite3.Error:
+        # Keep the records for the next flush
+        with _pending_lock:
+            for key, used in last_used.items():
+                _pending['last_used'][key] = max(used, _pending['last_used'].get(key, used))
+            for name, (hits, misses) in stats.items():
+                counts = _pending['stats'].setdefault(name, [0, 0])
+                counts[0] += hits
+                counts[1] += misses
+        raise
+
+
+def flush(force=False):
+    """
+    Write the times of use and the counters recorded in memory, in one transaction, if
+    FLUSH_INTERVAL elapsed since the last flush.
+
+    Parameters:
+        force (bool): Whether to write them even if the interval did not elapse.
+    """
+    with _pending_lock:
+        if not _pending['last_used'] and not _pending['stats']:
+            return
+        if not force and time.monotonic() - _pending['flushed'] < FLUSH_INTERVAL:
+            return
+
+    connection = _connect()
+    with connection:
+        connection.execute('BEGIN IMMEDIATE')
+        _write_pending(connection)
+
+
+def _remember(key, value):
+    """
+    Keep a decoded result in the memory of this process, evicting the least recently used one.
+
+    Parameters:
+        key (str): The key of the result.
+        value: The decoded result.
+    """
+    with _pending_lock:
+        _memory[key] = value
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def load(name, key):
+    """
+    Look up a result and count the hit or the miss, without writing to the cache file.
+
+    Parameters:
+        name (str): The name of the callback.
+        key (str): The key of the result, see get_key.
+
+    Returns:
+        The decoded result, or None if it is not cached.
+    """
+    with _pending_lock:
+        value = _memory.get(key)
+        if value is not None:
+            _memory.move_to_end(key)
+
+    if value is None:
+        row = _connect().execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            value = json.loads(row[0])
+            _remember(key, value)
+
+    _record(name, key, value is not None)
+    try:
+        flush()
+    except sqlite3.Error:
+        pass  # The file is locked by another process, the records are written at the next flush
+    return value
+
+
+def _evict(connection, max_bytes):
+    """
+    Delete the least recently used results until the cache is below EVICTION_TARGET of its size.
+
+    Parameters:
+        connection (Connection): The connection to the cache file, in a transaction.
+        max_bytes (int): The maximum total size of the results.
+    """
+    total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+    if total <= max_bytes:
+        return
+
+    # Delete from the oldest result, while the results left are above the target
+    connection.execute('''
+        DELETE FROM results WHERE key IN (
+            SELECT key FROM (
+                SELECT key, SUM(size) OVER (ORDER BY last_used, key) AS freed FROM results
+            ) WHERE freed - size < ?
+        )''', (total - int(max_bytes * EVICTION_TARGET),))
+
+
+def store(name, key, data_key, value_json, max_bytes=MAX_BYTES):
+    """
+    Store a result, evicting the least recently used ones if the cache is full.
+
+    Parameters:
+        name (str): The name of the callback.
+        key (str): The key of the result, see get_key.
+        data_key (str): The key of the data the result was computed from.
+        value_json (str): The JSON of the result.
+        max_bytes (int): The maximum total size of the results.
+    """
+    if len(value_json) > max_bytes:
+        return
+
+    connection = _connect()
+    with connection:
+        connection.execute('BEGIN IMMEDIATE')
+
+        # The results of the previous data can no longer be hit
+        if _last_data_key['value'] != data_key:
+            connection.execute('DELETE FROM results WHERE data_key != ?', (data_key,))
+            _last_data_key['value'] = data_key
+
+        connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                           (key, name, data_key, value_json, len(value_json), time.time()))
+        _write_pending(connection)
+        _evict(connection, max_bytes)
+
+
+# Function to cache the results of a callback
+def memoize(name, normalize=None):
+    """
+    Cache the results of a callback, for the current data.
+
+    The cache returns the results decoded and shared between the calls, so the callers must not
+    modify them. Results that are None or not serializable to JSON are returned without being
+    cached, and so are the exceptions of the callback, such as PreventUpdate. If the cache file
+    cannot be used, the callback is called as if it were not cached.
+
+    Parameters:
+        name (str): The name of the callback in the cache.
+        normalize (callable): Converts the arguments of the callback to the list of the inputs that
+            determine its result, defaults to the list of the arguments.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args):
+            try:
+                data_key = get_data_key(globals.get_dataset())
+                key = get_key(name, normalize(*args) if normalize else list(args), data_key)
+                value = load(name, key)
+            except sqlite3.Error:
+                return function(*args)
+
+            if value is not None:
+                return value
+
+            result = function(*args)
+            if result is None:
+                return result  # Stored as null, it could never be told from a miss
+
+            try:
+                value_json = to_json_plotly(result)
+            except (TypeError, ValueError):
+                return result  # Not serializable, the result is only returned
+            try:
+                store(name, key, data_key, value_json)
+            except sqlite3.Error:
+                pass  # The cache is locked or unavailable, the result is only returned
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def get_stats():
+    """
+    Get the counters and the size of the cache.
+
+    Returns:
+        dict: The hits and misses by callback, and the number and total size of the results.
+    """
+    flush(force=True)
+    connection = _connect()
+    callbacks = {name: {'hits': hits, 'misses': misses}
+                 for name, hits, misses in connection.execute('SELECT name, hits, misses FROM stats ORDER BY name')}
+    entries, size = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+    return {'callbacks': callbacks, 'entries': entries, 'bytes': size, 'max_bytes': MAX_BYTES}
+
+
+def clear():
+    """
+    Delete all the cached results and reset the counters.
+    """
+    with _pending_lock:
+        _pending.update(last_used={}, stats={})
+        _memory.clear()
+    connection = _connect()
+    with connection:
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute('DELETE FROM results')
+        connection.execute('DELETE FROM stats')
+
+
+def register_admin_endpoint(server):
+    """
+    Add the /admin/cache endpoint, which reports the counters of the cache and clears it on DELETE,
+    to the Flask server.
+
+    Parameters:
+        server (Flask): The Flask server of the Dash app.
+    """
+    @server.route('/admin/cache', methods=['GET', 'DELETE'])
+    def admin_cache():  # pylint: disable=unused-variable
+        if not reloader.is_admin_request():
+            return jsonify(error='forbidden'), 403
+        if not ENABLED:
+            return jsonify(enabled=False)
+
+        if request.method == 'DELETE':
+            clear()
+        return jsonify(enabled=True, **get_stats())
+
+
+# Write the records of this process when it exits
+atexit.register(lambda: ENABLED and flush(force=True))
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: serialize.py
+    Purpose: Contains the post-processing of the figures sent to the browser.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to make the JSON of a figure smaller before it is sent:
+    customdata columns that repeat another array of their trace or hold a single value are moved
+    into the hover template, unused ones are dropped, floats are rounded to their display precision
+    and, when the plotly.js served by Dash supports it, numeric arrays are sent as base64 typed
+    arrays. The bytes saved by every named figure are kept for the server log.
+
+    Set POWER_TYPED_ARRAYS to 0 or 1 to force the typed arrays off or on instead of detecting support.
+'''
+
+import base64
+import os
+import re
+import threading
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+# Number of decimals kept in the floats of the figures, the precision of the hover templates
+DECIMALS = 2
+
+# Minimum length of an array worth encoding as a typed array
+MIN_TYPED_ARRAY_LENGTH = 16
+
+# Trace types whose customdata holds one row per point
+POINT_TRACE_TYPES = ('scatter', 'scattergl', 'bar')
+
+# Attributes of a point that the hover template can show instead of a customdata column
+POINT_ATTRIBUTES = ('x', 'y')
+
+# Smallest typed array type of the integer arrays, by range
+INTEGER_TYPES = [('i1', -2 ** 7, 2 ** 7 - 1), ('u1', 0, 2 ** 8 - 1), ('i2', -2 ** 15, 2 ** 15 - 1),
+                 ('u2', 0, 2 ** 16 - 1), ('i4', -2 ** 31, 2 ** 31 - 1), ('u4', 0, 2 ** 32 - 1)]
+
+# Bytes of JSON before and after compaction, by figure name
+_savings = {}
+_savings_lock = threading.Lock()
+
+
+def _get_served_plotlyjs_version():
+    """
+    Get the version of the plotly.js served by Dash to the browser.
+
+    Returns:
+        tuple: The version numbers, or None if they cannot be found.
+    """
+    import dash  # pylint: disable=import-outside-toplevel
+    from dash import dcc  # pylint: disable=import-outside-toplevel
+
+    if hasattr(dash.Dash, '_setup_plotlyjs'):
+        # Recent versions of Dash serve the plotly.js of the plotly package
+        from plotly.offline import get_plotlyjs_version  # pylint: disable=import-outside-toplevel
+        version = get_plotlyjs_version()
+    else:
+        # Older versions of Dash serve the plotly.js bundled with the core components
+        try:
+            with open(os.path.join(os.path.dirname(dcc.__file__), 'plotly.min.js'), 'r', encoding='utf-8') as bundle:
+                match = re.search(r'plotly\.js v(\d+\.\d+\.\d+)', bundle.read(1000))
+        except OSError:
+            return None
+        if match is None:
+            return None
+        version = match.group(1)
+    return tuple(int(number) for number in version.split('.'))
+
+
+# Function to check whether the browser can decode typed arrays in the figures
+def supports_typed_arrays():
+    """
+    Check whether numeric arrays can be sent as base64 typed arrays, which plotly.js decodes
+    since version 2.28.
+
+    Returns:
+        bool: True if typed arrays are enabled.
+    """
+    setting = os.environ.get('POWER_TYPED_ARRAYS', 'auto')
+    if setting != 'auto':
+        return setting == '1'
+    version = _get_served_plotlyjs_version()
+    return version is not None and version >= (2, 28, 0)
+
+
+TYPED_ARRAYS = supports_typed_arrays()
+
+
+def _to_numeric_array(value):
+    """
+    Convert an array of a figure to a NumPy array, if it holds numbers.
+
+    Parameters:
+        value: The value of an attribute of a trace.
+
+    Returns:
+        ndarray: The numbers, or None if the value is not a numeric array.
+    """
+    if not isinstance(value, (list, tuple, np.ndarray)) or len(value) == 0:
+        return None
+    try:
+        values = np.asarray(value)
+    except ValueError:  # Ragged nested lists
+        return None
+    if values.dtype.kind not in 'iuf':
+        return None
+    return values
+
+
+def _encode_array(values, decimals, typed_arrays):
+    """
+    Round a numeric array and encode it as a typed array if enabled.
+
+    Parameters:
+        values (ndarray): The numbers.
+        decimals (int): The number of decimals kept in the floats.
+        typed_arrays (bool): Whether to encode the array as a base64 typed array.
+
+    Returns:
+        The rounded array, or its typed array specification.
+    """
+    if values.dtype.kind == 'f':
+        # Rounded in double precision, so that single precision columns print short JSON numbers
+        values = values.astype('float64').round(decimals)
+        if typed_arrays and len(values) >= MIN_TYPED_ARRAY_LENGTH:
+            # Single precision keeps about 7 significant digits, more than the display precision
+            encoded = values.astype('<f4')
+            typed_array = {'dtype': 'f4', 'bdata': base64.b64encode(encoded.tobytes()).decode('ascii')}
+            if encoded.ndim > 1:
+                typed_array['shape'] = ','.join(str(size) for size in encoded.shape)
+            return typed_array
+        return values
+
+    if typed_arrays and len(values) >= MIN_TYPED_ARRAY_LENGTH and values.ndim == 1:
+        low, high = int(values.min()), int(values.max())
+        for dtype, type_min, type_max in INTEGER_TYPES:
+            if type_min <= low and high <= type_max:
+                encoded = values.astype(f'<{dtype}')
+                return {'dtype': dtype, 'bdata': base64.b64encode(encoded.tobytes()).decode('ascii')}
+    return values
+
+
+def _round_mixed_columns(customdata, decimals):
+    """
+    Round the float columns of a customdata array that also holds other values, such as dates.
+
+    Parameters:
+        customdata (array-like): The customdata, one row per point.
+        decimals (int): The number of decimals kept in the floats.
+
+    Returns:
+        The customdata with its float columns rounded.
+    """
+    columns = np.array(customdata, dtype=object)
+    if columns.ndim not in (1, 2):
+        return customdata
+    for column in (columns.reshape(len(columns), -1)).T:
+        if all(isinstance(value, (float, np.floating)) for value in column):
+            column[:] = column.astype('float64').round(decimals)
+    return columns
+
+
+def _compact_attributes(attributes, decimals, typed_arrays):
+    """
+    Round and encode the numeric arrays of a trace, including its nested attributes.
+
+    Parameters:
+        attributes (dict): The attributes of the trace, or of one of its nested objects.
+        decimals (int): The number of decimals kept in the floats.
+        typed_arrays (bool): Whether to encode the arrays as base64 typed arrays.
+
+    Returns:
+        dict: A copy of the attributes with the arrays compacted.
+    """
+    compacted = {}
+    for key, value in attributes.items():
+        if isinstance(value, dict):
+            compacted[key] = _compact_attributes(value, decimals, typed_arrays)
+            continue
+        values = _to_numeric_array(value)
+        if values is None and key == 'customdata' and value is not None:
+            compacted[key] = _round_mixed_columns(value, decimals)
+        elif values is None:
+            compacted[key] = value
+        elif key == 'customdata':
+            # customdata may be shown without a format, so it keeps its JSON numbers
+            compacted[key] = _encode_array(values, decimals, False)
+        else:
+            compacted[key] = _encode_array(values, decimals, typed_arrays)
+    return compacted
+
+
+def _get_column_reference(trace, column, formats):
+    """
+    Find how the hover template can show a customdata column without it.
+
+    Parameters:
+        trace (dict): The trace.
+        column (ndarray): The values of the column.
+        formats (set): The formats with which the template shows the column.
+
+    Returns:
+        tuple: ('attribute', name) if the column repeats an attribute of the points,
+            ('constant', text) if it holds a single value shown without a format, or None.
+    """
+    for attribute in POINT_ATTRIBUTES:
+        values = trace.get(attribute)
+        if values is not None and len(values) == len(column) and np.array_equal(np.asarray(values, dtype=object), column):
+            return 'attribute', attribute
+    if formats == {''} and all(value == column[0] for value in column):
+        return 'constant', str(column[0])
+    return None
+
+
+def _trim_customdata(trace):
+    """
+    Move into the hover template the customdata columns that hold a single value or repeat the x
+    or y values of the trace, and drop the columns the template does not show.
+
+    Parameters:
+        trace (dict): The trace, modified in place.
+    """
+    template = trace.get('hovertemplate')
+    customdata = trace.get('customdata')
+    if (trace.get('type', 'scatter') not in POINT_TRACE_TYPES or not isinstance(template, str)
+            or customdata is None or len(customdata) == 0):
+        return
+
+    columns = np.asarray(customdata, dtype=object)
+    flat = columns.ndim == 1
+    if flat:
+        columns = columns.reshape(-1, 1)
+    if columns.ndim != 2:
+        return
+
+    # %{customdata} for one value per point, %{customdata[i]} for a column, with an optional format
+    pattern = r'%\{customdata(?:\[(\d+)\])?([:|][^}]*)?\}'
+    formats = {}
+    for match in re.finditer(pattern, template):
+        if (match.group(1) is None) != flat:
+            return  # The template does not match the shape of the customdata
+        index = 0 if flat else int(match.group(1))
+        if index >= columns.shape[1]:
+            return
+        formats.setdefault(index, set()).add(match.group(2) or '')
+
+    references = {index: _get_column_reference(trace, columns[:, index], column_formats)
+                  for index, column_formats in formats.items()}
+    kept = sorted(index for index, reference in references.items() if reference is None)
+    new_indices = {index: position for position, index in enumerate(kept)}
+
+    def replace(match):
+        index = 0 if flat else int(match.group(1))
+        column_format = match.group(2) or ''
+        reference = references[index]
+        if reference is None:
+            if len(kept) == 1:
+                return f'%{{customdata{column_format}}}'
+            return f'%{{customdata[{new_indices[index]}]{column_format}}}'
+        kind, value = reference
+        return f'%{{{value}{column_format}}}' if kind == 'attribute' else value
+
+    trace['hovertemplate'] = re.sub(pattern, replace, template)
+    if not kept:
+        del trace['customdata']
+    elif len(kept) == 1:
+        trace['customdata'] = columns[:, kept[0]]
+    else:
+        trace['customdata'] = columns[:, kept]
+
+
+# Function to make the JSON of a figure smaller
+def compact_figure(figure, name=None, decimals=DECIMALS, typed_arrays=None):
+    """
+    Post-process a figure before it is sent to the browser: trim the customdata of its traces,
+    round its floats to the display precision and encode its numeric arrays as typed arrays.
+
+    Parameters:
+        figure (Figure or dict): The figure, which is not modified.
+        name (str): The name under which the bytes saved are recorded, None to skip measuring them.
+        decimals (int): The number of decimals kept in the floats.
+        typed_arrays (bool): Whether to encode the arrays as base64 typed arrays, defaults to
+            TYPED_ARRAYS.
+
+    Returns:
+        dict: The compacted figure.
+    """
+    typed_arrays = TYPED_ARRAYS if typed_arrays is None else typed_arrays
+    figure_dict = figure.to_plotly_json() if hasattr(figure, 'to_plotly_json') else figure
+
+    data = []
+    for trace in figure_dict.get('data', []):
+        trace = dict(trace)
+        _trim_customdata(trace)
+        data.append(_compact_attributes(trace, decimals, typed_arrays))
+    compacted = {**figure_dict, 'data': data}
+
+    if name is not None:
+        record_savings(name, len(to_json_plotly(figure_dict)), len(to_json_plotly(compacted)))
+    return compacted
+
+
+def record_savings(name, original_bytes, compacted_bytes):
+    """
+    Record the size of the JSON of a figure before and after compaction.
+
+    Parameters:
+        name (str): The name of the figure.
+        original_bytes (int): The size of the JSON of the original figure.
+        compacted_bytes (int): The size of the JSON of the compacted figure.
+    """
+    with _savings_lock:
+        _savings[name] = (original_bytes, compacted_bytes)
+
+
+def get_report():
+    """
+    Describe the bytes saved by the compaction of the named figures.
+
+    Returns:
+        str: One line per figure with its size before and after compaction.
+    """
+    with _savings_lock:
+        savings = sorted(_savings.items())
+    original = sum(before for _, (before, _) in savings)
+    compacted = sum(after for _, (_, after) in savings)
+    lines = [f'{name}: {before / 1e3:.1f} kB -> {after / 1e3:.1f} kB' for name, (before, after) in savings]
+    lines.append(f'total: {original / 1e3:.1f} kB -> {compacted / 1e3:.1f} kB '
+                 f'({original - compacted} bytes saved, typed arrays {"on" if TYPED_ARRAYS else "off"})')
+    return '\n'.join(lines)
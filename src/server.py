@@ -11,25 +11,114 @@
     Python Version: 3.8
 
     This file provides the functionality to run a Flask server that serves the Dash application.
+
+    `python server.py` runs the single-process development server. In production, run from the
+    src directory `gunicorn -c gunicorn.conf.py server:application` (see gunicorn.conf.py), or
+    `python server.py --production` which starts gunicorn with the same configuration.
 '''
 
+import argparse
+import os
+import sys
+
 from flask_failsafe import failsafe
 
+
+# Function to build the Flask server of the Dash app
+def build_server(watch=True, background_warm_up=False):
+    """
+    Gets the underlying Flask server from our Dash app, with its health, readiness and reload
+    endpoints, and loads the data ahead of the first request.
+
+    Parameters:
+        watch (bool): Whether this process polls the data file and reloads the data itself.
+        background_warm_up (bool): Whether to load the data in a background thread, the
+            readiness endpoint reporting when it is done.
+
+    Returns:
+        Flask app: The Flask server to be run.
+    """
+    # The imports are inside the function to work with the failsafe mechanism
+    import health  # pylint: disable=import-outside-toplevel
+    import reloader  # pylint: disable=import-outside-toplevel
+    import resultcache  # pylint: disable=import-outside-toplevel
+    import serialize  # pylint: disable=import-outside-toplevel
+    import singleflight  # pylint: disable=import-outside-toplevel
+    from app import app  # pylint: disable=import-outside-toplevel
+
+    def log_report(data):
+        app.logger.info('Precomputed dropdown figures: %s', data.get_figure('dropdown_figures').report())
+        app.logger.info('Compacted figures:\n%s', serialize.get_report())
+
+    health.register_health_endpoints(app.server)
+    reloader.register_admin_endpoint(app.server)
+    resultcache.register_admin_endpoint(app.server)
+    singleflight.register_admin_endpoint(app.server)
+
+    # Load the data and build the initial figures before serving the first request
+    health.warm_up(background_warm_up, on_ready=log_report)
+
+    # Reload the data when the data file changes, without restarting the server
+    if watch:
+        reloader.start_watcher()
+    return app.server
+
+
 # Define a failsafe decorator to create the Flask server
 @failsafe
 def create_app():
     """
-    Gets the underlying Flask server from our Dash app.
+    Gets the underlying Flask server from our Dash app, for the development server.
 
     Returns:
         Flask app: The Flask server to be run.
     """
-    # The import is inside the function to work with the failsafe mechanism
-    from app import app  # pylint: disable=import-outside-toplevel
-    return app.server
+    return build_server()
+
+
+def run_production(config_path='gunicorn.conf.py'):
+    """
+    Run the production server with gunicorn, configured by gunicorn.conf.py and the environment.
+
+    Parameters:
+        config_path (str): The path of the gunicorn configuration file.
+    """
+    try:
+        from gunicorn.app.wsgiapp import run  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        sys.exit('The production server requires gunicorn, which is not available on Windows: pip install gunicorn')
+
+    sys.argv = ['gunicorn', '-c', config_path, 'server:application']
+    run()
+
+
+# Flask server loaded by gunicorn, built on first access so that importing this module stays cheap
+_application = None
+
+
+# Lazy access to the production server as a module attribute (server.application): under gunicorn
+# the data file is watched by the master process, and POWER_PRELOAD=0 loads the data in the
+# background of each worker instead of before fork
+def __getattr__(name):
+    global _application  # pylint: disable=global-statement
+
+    if name == 'application':
+        if _application is None:
+            preload = os.environ.get('POWER_PRELOAD', '1') != '0'
+            _application = build_server(watch=False, background_warm_up=not preload)
+        return _application
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 
 # Entry point to run the Flask server
 if __name__ == "__main__":
-    # Create and run the Flask app on port 8050 with debug mode enabled
-    create_app().run(port="8050", debug=True)
+    parser = argparse.ArgumentParser(description='Run the Dash application.')
+    parser.add_argument('--production', action='store_true',
+                        help='run the multi-process gunicorn server instead of the development server')
+    arguments = parser.parse_args()
+
+    if arguments.production:
+        run_production()
+    else:
+        # Create and run the Flask app on port 8050 with debug mode enabled
+        create_app().run(port="8050", debug=True)
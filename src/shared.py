@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: shared.py
+    Purpose: Contains functions to share the DataFrames between server worker processes.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to publish the columns of the DataFrames in shared memory
+    from a single loader process, and to attach zero-copy views over them from the workers.
+
+    Run the loader from the src directory with `python shared.py --manifest /tmp/power.json`, then
+    start the workers with POWER_SHARED_MANIFEST=/tmp/power.json: they attach to the published
+    columns instead of parsing the data file. The loader republishes the data when the data file
+    changes, and removes the shared memory when it exits. A worker closes its mappings of a
+    publication once the frames attached to it are no longer used, such as after a reload.
+'''
+
+import argparse
+import atexit
+import json
+import os
+import signal
+import sys
+import time
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+import cache
+
+# Shared memory segments of frames no longer used whose columns were still viewed, closed later
+_retired = []
+
+
+def _create_segment(values):
+    """
+    Copy a 2D array into a new shared memory segment.
+
+    Parameters:
+        values (ndarray): The array to copy.
+
+    Returns:
+        SharedMemory: The new segment.
+    """
+    segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, values.dtype, buffer=segment.buf)[:] = values
+    return segment
+
+
+def _open_segment(name, untrack=True):
+    """
+    Open an existing shared memory segment without taking ownership of it.
+
+    Parameters:
+        name (str): The name of the segment.
+        untrack (bool): Whether to remove the segment from the resource tracker, False when the
+            tracker is shared with the creator of the segment, as for its spawned child processes.
+
+    Returns:
+        SharedMemory: The opened segment.
+    """
+    try:
+        segment = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every opened segment is tracked, and unlinked when the process exits
+        segment = shared_memory.SharedMemory(name=name)
+        if untrack:
+            resource_tracker.unregister(segment._name, 'shared_memory')  # pylint: disable=protected-access
+    return segment
+
+
+# Function to publish the DataFrames of a dataset in shared memory
+def publish(dataset, manifest_path):
+    """
+    Copy the columns of the DataFrames of a dataset into shared memory and write their manifest.
+
+    The columns of each frame are grouped by dtype, and each group is stored as one
+    (columns x rows) array so that every column is contiguous.
+
+    Parameters:
+        dataset (Dataset): The dataset to publish.
+        manifest_path (str): The path of the manifest file describing the published columns.
+
+    Returns:
+        list: The created segments, to be kept open and unlinked by the caller.
+    """
+    segments = []
+    manifest = {'cache_key': dataset.get_cache_key(), 'frames': {}}
+
+    for name in cache.FRAME_NAMES:
+        frame = getattr(dataset, name)
+        blocks = []
+        for dtype in dict.fromkeys(frame.dtypes):
+            columns = [col for col in frame.columns if frame[col].dtype == dtype]
+            if dtype == 'object' or pd.api.types.is_extension_array_dtype(dtype):
+                raise ValueError(f'Column type {dtype} of {name} cannot be shared: {columns}')
+
+            segment = _create_segment(np.ascontiguousarray(frame[columns].to_numpy(dtype).T))
+            segments.append(segment)
+            blocks.append({'segment': segment.name, 'dtype': np.dtype(dtype).str, 'columns': columns})
+
+        manifest['frames'][name] = {'rows': len(frame), 'blocks': blocks}
+
+    # Replace the manifest atomically so that workers never read a partial one
+    tmp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(tmp_path, manifest_path)
+
+    return segments
+
+
+# Function to read the manifest of the published DataFrames
+def read_manifest(manifest_path):
+    """
+    Read the manifest of the DataFrames published in shared memory.
+
+    Parameters:
+        manifest_path (str): The path of the manifest file.
+
+    Returns:
+        dict: The manifest.
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)
+
+
+def _attach_frame(frame_manifest, untrack=True):
+    """
+    Build a DataFrame whose columns are views over shared memory.
+
+    Parameters:
+        frame_manifest (dict): The manifest of the frame.
+        untrack (bool): Whether to remove the segments from the resource tracker, see _open_segment.
+
+    Returns:
+        DataFrame: The frame, with its columns grouped by dtype.
+    """
+    rows = frame_manifest['rows']
+    parts, segments = [], []
+    for block in frame_manifest['blocks']:
+        segment = _open_segment(block['segment'], untrack)
+        segments.append(segment)
+
+        values = np.ndarray((len(block['columns']), rows), np.dtype(block['dtype']), buffer=segment.buf)
+        # The transposed array is stored by pandas as is, without copying it
+        parts.append(pd.DataFrame(values.T, columns=block['columns'], copy=False))
+
+    # The segments stay mapped as long as the frame, and are closed once it is collected
+    frame = pd.concat(parts, axis=1, copy=False)
+    weakref.finalize(frame, _close_segments, segments)
+    return frame
+
+
+def _close_segments(segments):
+    """
+    Close the mappings of shared memory segments, without removing the segments.
+
+    Segments whose columns are still viewed, by a column taken from a collected frame for example,
+    are kept and closed at a later attach.
+
+    Parameters:
+        segments (list): The segments to close.
+    """
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            _retired.append(segment)
+
+
+# Function to attach to the published DataFrames
+def attach(manifest_path, retries=3, untrack=True):
+    """
+    Attach to the DataFrames published in shared memory, without copying their columns.
+
+    The frames must not be modified in place, since every worker shares them.
+
+    Parameters:
+        manifest_path (str): The path of the manifest file.
+        retries (int): The number of attempts, in case the loader republishes in the meantime.
+        untrack (bool): Whether to remove the segments from the resource tracker, see _open_segment.
+
+    Returns:
+        tuple: The cache key of the published data and the dictionary of frames.
+    """
+    # Close the mappings of the previous publications that are no longer viewed
+    retired = list(_retired)
+    del _retired[:]
+    _close_segments(retired)
+
+    for attempt in range(retries):
+        manifest = read_manifest(manifest_path)
+        try:
+            frames = {name: _attach_frame(frame_manifest, untrack) for name, frame_manifest in manifest['frames'].items()}
+            return manifest['cache_key'], frames
+        except FileNotFoundError:
+            # The segments were replaced between the read of the manifest and their opening
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.1)
+    return None
+
+
+def release(segments):
+    """
+    Close and remove shared memory segments.
+
+    Parameters:
+        segments (list): The segments to remove.
+    """
+    for segment in segments:
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def run_loader(manifest_path, interval):
+    """
+    Publish the DataFrames in shared memory and republish them whenever the data file changes.
+
+    Parameters:
+        manifest_path (str): The path of the manifest file.
+        interval (float): The interval in seconds between two checks of the data file.
+    """
+    import globals  # pylint: disable=import-outside-toplevel,redefined-builtin
+
+    # The loader reads the data file itself, it never attaches to a previous publication
+    globals.shared_manifest = None
+
+    published = {'segments': publish(globals.warm_up(figures=False), manifest_path)}
+    atexit.register(lambda: release(published['segments']))
+    atexit.register(lambda: os.path.exists(manifest_path) and os.remove(manifest_path))
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f'Published {globals.get_dataset().get_cache_key()} to {manifest_path}', flush=True)
+
+    while True:
+        time.sleep(interval)
+        if globals.get_source_key() != globals.get_dataset().get_cache_key():
+            segments = publish(globals.reload_data(figures=False), manifest_path)
+
+            # Attached workers keep their mappings; new workers read the new manifest
+            release(published['segments'])
+            published['segments'] = segments
+            print(f'Republished {globals.get_dataset().get_cache_key()} to {manifest_path}', flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publish the DataFrames in shared memory for the server workers.')
+    parser.add_argument('--manifest', required=True, help='path of the manifest file read by the workers')
+    parser.add_argument('--interval', type=float, default=30, help='seconds between two checks of the data file')
+    arguments = parser.parse_args()
+
+    run_loader(arguments.manifest, arguments.interval)
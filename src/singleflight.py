@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: singleflight.py
+    Purpose: Contains the coalescing of identical concurrent callback calls.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    This file provides the functionality to run a callback once for concurrent requests with the
+    same inputs on the same data: the first request computes the result, the requests arriving
+    while it is in flight wait for it and return the same result, or raise the same exception.
+    Calls are only coalesced within a process; the result cache (see resultcache.py) shares the
+    results between processes once they are computed.
+
+    A waiting request computes the result itself when the computation in flight takes more than
+    WAIT_TIMEOUT seconds, so that a stuck computation does not hold every request with the same
+    inputs; set POWER_SINGLEFLIGHT_TIMEOUT to change it.
+
+    The number of calls, of executions, of coalesced calls and of timed out waits of each callback
+    are reported by /admin/singleflight.
+'''
+
+import functools
+import json
+import os
+import threading
+
+from flask import jsonify
+
+import globals  # pylint: disable=redefined-builtin
+import reloader
+
+# Seconds a coalesced call waits for the computation in flight before computing the result itself
+WAIT_TIMEOUT = float(os.environ.get('POWER_SINGLEFLIGHT_TIMEOUT', '30'))
+
+
+class _Flight:
+    """
+    Computation in progress of a result, awaited by the coalesced calls.
+
+    Attributes:
+        done (Event): Set once the result or the exception is available.
+        result: The result of the computation.
+        error (BaseException): The exception raised by the computation, if any.
+        waiters (int): The number of calls waiting for the result.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Group of calls in which at most one computation per key is in flight at a time.
+    """
+
+    def __init__(self, timeout=WAIT_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {}
+
+    def do(self, name, key, function, *args):
+        """
+        Call a function, or wait for the result of the call in flight for the same key, calling
+        the function anyway if that result is not available within the timeout of the group.
+
+        Parameters:
+            name (str): The name under which the call is counted.
+            key (hashable): The key of the result.
+            function (callable): The function computing the result.
+            args: The arguments of the function.
+
+        Returns:
+            The result of the function.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, {'calls': 0, 'executions': 0, 'coalesced': 0, 'errors': 0,
+                                                  'timeouts': 0, 'max_waiters': 0})
+            stats['calls'] += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                stats['executions'] += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                stats['coalesced'] += 1
+                stats['max_waiters'] = max(stats['max_waiters'], flight.waiters)
+                leader = False
+
+        if not leader:
+            if flight.done.wait(self.timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+
+            # The computation in flight is stuck or too slow, compute the result without it
+            with self._lock:
+                stats['timeouts'] += 1
+                stats['executions'] += 1
+            return function(*args)
+
+        try:
+            flight.result = function(*args)
+        except BaseException as error:
+            flight.error = error
+            with self._lock:
+                stats['errors'] += 1
+            raise
+        finally:
+            # Later calls start a new computation, the waiting ones get this result
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def get_stats(self):
+        """
+        Get the counters of the calls.
+
+        Returns:
+            dict: The calls, executions, coalesced calls, errors, timed out waits and maximum number
+                of calls waiting for the same computation, by name, and the number of computations
+                in flight.
+        """
+        with self._lock:
+            return {'callbacks': {name: dict(stats) for name, stats in sorted(self._stats.items())},
+                    'in_flight': len(self._flights)}
+
+
+# Calls of the callbacks of this process
+group = SingleFlight()
+
+
+# Function to coalesce the identical concurrent calls of a callback
+def coalesce(name, normalize=None):
+    """
+    Run a callback once for the concurrent calls with the same inputs on the same data.
+
+    Parameters:
+        name (str): The name of the callback in the counters.
+        normalize (callable): Converts the arguments of the callback to the list of the inputs that
+            determine its result, defaults to the list of the arguments.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args):
+            inputs = normalize(*args) if normalize else list(args)
+            key = (name, json.dumps(inputs, sort_keys=True, default=str), globals.get_dataset().version)
+            return group.do(name, key, function, *args)
+
+        return wrapper
+
+    return decorator
+
+
+def register_admin_endpoint(server):
+    """
+    Add the /admin/singleflight endpoint, which reports the counters of the calls of the worker
+    process answering it, to the Flask server.
+
+    Parameters:
+        server (Flask): The Flask server of the Dash app.
+    """
+    @server.route('/admin/singleflight')
+    def admin_singleflight():  # pylint: disable=unused-variable
+        if not reloader.is_admin_request():
+            return jsonify(error='forbidden'), 403
+        return jsonify(pid=os.getpid(), **group.get_stats())
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+'''
+    File name: test_globals.py
+    Purpose: Contains the tests of the appends of new readings to the data.
+    Authors:
+        - Yuashun Cui - 2404877
+        - Samira Nazari - 2310647
+        - Mohamad Hadi Ajami - 2227105
+    Course: INF8808
+    Python Version: 3.8
+
+    Run from the src directory with `python -m pytest test_globals.py`.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import globals  # pylint: disable=redefined-builtin
+import preprocess
+
+
+# Function to generate raw readings with the columns of the CSV file
+def make_raw_rows(start, periods):
+    """
+    Generate raw readings every 10 minutes, with distinct values.
+
+    Parameters:
+        start (str): The timestamp of the first reading.
+        periods (int): The number of readings.
+
+    Returns:
+        DataFrame: The readings, with the columns of the CSV file.
+    """
+    timestamps = pd.date_range(start, periods=periods, freq='10min')
+    offsets = (timestamps - pd.Timestamp('2017-01-01')) / pd.Timedelta('10min')
+    rows = pd.DataFrame({preprocess.DATETIME_COLUMN: timestamps.strftime(preprocess.DATETIME_FORMAT)})
+    for position, column in enumerate(preprocess.CSV_DTYPES):
+        rows[column] = np.asarray(offsets, dtype='float64') + position
+    return rows
+
+
+# Function to build the set of DataFrames of raw readings, as if read from the data file
+def make_dataset(raw_rows):
+    """
+    Preprocess raw readings and aggregate them into a set of DataFrames.
+
+    Parameters:
+        raw_rows (DataFrame): The readings, with the columns of the CSV file.
+
+    Returns:
+        Dataset: The set of DataFrames.
+    """
+    df = preprocess.preprocess_raw_data(preprocess.parse_datetime(raw_rows.astype(preprocess.CSV_DTYPES)))
+    frames = {'df': df, 'df_hourly': preprocess.get_HourlyData(df), 'df_daily': preprocess.get_DailyData(df)}
+    return globals.Dataset(globals.file_path, frames=frames, cache_key='test')
+
+
+@pytest.fixture
+def ingested():
+    """
+    Set the current data to two days of readings, and restore the previous data afterwards.
+    """
+    previous = globals.dataset
+    globals.dataset = make_dataset(make_raw_rows('2017-01-01 00:00', 288))
+    yield globals.dataset
+    globals.dataset = previous
+
+
+def test_append_rows_ignores_overlapping_readings(ingested):
+    # The second day is sent again along with the half of the third day
+    globals.append_rows(make_raw_rows('2017-01-02 00:00', 216))
+
+    expected = make_dataset(make_raw_rows('2017-01-01 00:00', 360))
+    data = globals.get_dataset()
+    assert len(data.df) == len(expected.df)
+    pd.testing.assert_frame_equal(data.df_hourly, expected.df_hourly, check_dtype=False)
+    pd.testing.assert_frame_equal(data.df_daily, expected.df_daily, check_dtype=False)
+
+
+def test_append_rows_ignores_repeated_batch(ingested):
+    batch = make_raw_rows('2017-01-03 00:00', 36)
+    appended = globals.append_rows(batch)
+
+    # The same batch again adds nothing, and duplicates within a batch are counted once
+    assert globals.append_rows(batch) is appended
+    assert globals.append_rows(pd.concat([batch, batch])) is appended
+    assert appended.version == ingested.version + 1
+    assert len(appended.df) == len(ingested.df) + 36
+
+
+def test_append_rows_in_batches_matches_single_load(ingested):
+    # Batches ending within an hour and a day, so that their first buckets are completed later
+    for start, periods in (('2017-01-03 00:00', 40), ('2017-01-03 06:40', 5), ('2017-01-03 07:30', 200)):
+        globals.append_rows(make_raw_rows(start, periods))
+
+    expected = make_dataset(make_raw_rows('2017-01-01 00:00', 533))
+    data = globals.get_dataset()
+    assert data.get_last_datetime() == expected.df['datetime'].max()
+    pd.testing.assert_frame_equal(data.df, expected.df, check_dtype=False)
+    pd.testing.assert_frame_equal(data.df_hourly, expected.df_hourly, check_dtype=False)
+    pd.testing.assert_frame_equal(data.df_daily, expected.df_daily, check_dtype=False)